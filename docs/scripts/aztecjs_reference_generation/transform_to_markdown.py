@@ -7,28 +7,142 @@ Usage:
     python transform_to_markdown.py --input api_docs.json --output api-reference.md --title "Custom Title"
 """
 
+import functools
+import hashlib
+import io
 import json
 import argparse
-from typing import Dict, Any, List
+import mmap
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple, Union
 from pathlib import Path
 
-try:
-    import yaml
-    YAML_AVAILABLE = True
-except ImportError:
-    YAML_AVAILABLE = False
+# slugify helpers: separators become hyphens, anything that is not alphanumeric
+# (str.isalnum semantics, which \w matches once "_" is mapped) or a hyphen is
+# dropped, and runs of hyphens are collapsed.
+_SLUG_SEPARATORS = str.maketrans({" ": "-", "/": "-", ".": "-", "_": "-"})
+_SLUG_DISALLOWED = re.compile(r"[^\w-]")
+_SLUG_HYPHEN_RUNS = re.compile(r"-{2,}")
+
+# Raw input contents: bytes, or a memoryview over a memory-mapped file
+Buffer = Union[bytes, memoryview]
+
+# Inputs at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Shared read-only default for missing "jsdoc" entries
+_EMPTY: Dict[str, Any] = {}
+
+# "**Type:**" line for each export kind, built once instead of per export
+EXPORT_TYPE_LINES = {
+    kind: f"\n**Type:** {label}\n"
+    for kind, label in (
+        ("class", "Class"),
+        ("interface", "Interface"),
+        ("type", "Type Alias"),
+        ("function", "Function"),
+        ("const", "Constant"),
+    )
+}
+
+# Member kinds rendered for each export kind, in display order, with the
+# subsection heading they are listed under (None: listed under a shared heading)
+MemberSections = Tuple[Tuple[str, Optional[str]], ...]
+
+CLASS_MEMBER_SECTIONS: MemberSections = (
+    ("constructor", "\n\n#### Constructor\n"),
+    ("property", "\n\n#### Properties\n"),
+    ("method", "\n\n#### Methods\n"),
+    ("getter", "\n\n#### Getters\n"),
+    ("setter", "\n\n#### Setters\n"),
+)
+INTERFACE_MEMBER_SECTIONS: MemberSections = (
+    ("property", "\n\n#### Properties\n"),
+    ("method", "\n\n#### Methods\n"),
+    ("call-signature", "\n\n#### Call Signatures\n"),
+)
+TYPE_MEMBER_SECTIONS: MemberSections = (
+    ("property", None),
+    ("method", None),
+    ("index-signature", None),
+    ("mapped-type", None),
+    ("call-signature", None),
+)
+TYPE_MEMBERS_HEADING = "\n\n**Type Members:**\n"
+
+# Member kinds whose docs start without a "#####" heading of their own
+HEADLESS_MEMBER_KINDS = frozenset(("constructor", "call-signature"))
+
+INTRODUCTION = """This document provides a comprehensive reference for all public APIs in the Aztec.js library.
+
+Each section is organized by module, with classes, interfaces, types, and functions documented with their full signatures, parameters, and return types.
+"""
+
+
+def format_parameter(param: Dict[str, Any]) -> str:
+    """Format one entry of a parameters list, including its description line."""
+    g = param.get
+    optional = " (optional)" if g("optional", False) else ""
+    description = g("description", "")
+    line = f"\n- `{g('name', '')}`{optional}: `{g('type', '')}`"
+    if description:
+        return f"{line}\n  - {description}"
+    return line
 
 
 class MarkdownGenerator:
-    """Generates markdown documentation from structured API data."""
+    """Generates markdown documentation from structured API data.
 
-    def __init__(self, data: Dict[str, Any], config: Dict[str, Any] = None):
+    All ``generate_*`` methods write their fragments straight to a single output
+    stream rather than returning joined strings, so the document is emitted in
+    one linear pass instead of being re-copied at every level. Callers write the
+    separating newline before invoking a nested generator.
+
+    ``out`` is typically the open output file, so the document is never held in
+    memory as a whole; without it an ``io.StringIO`` is used and ``generate()``
+    returns the document. With ``jobs > 1`` folder sections are rendered in a
+    process pool and written in order.
+
+    ``render_cache`` maps export content hashes to previously rendered markdown
+    (see load_render_cache); exports found there are not rendered again. Every
+    fragment used in a run is collected in ``rendered`` so it can be saved.
+    """
+
+    def __init__(self, data: Dict[str, Any], config: Dict[str, Any] = None, out: Optional[TextIO] = None,
+                 jobs: int = 1, render_cache: Optional[Dict[str, str]] = None):
         self.data = data
         # Merge provided config with defaults to ensure all config keys exist
         default_config = self.get_default_config()
         if config:
             default_config.update(config)
         self.config = default_config
+        self.out = out if out is not None else io.StringIO()
+        self.jobs = jobs
+        # Number of exports rendered so far, reported by main
+        self.export_count = 0
+        self.render_cache = render_cache
+        self.rendered: Dict[str, str] = {}
+        if render_cache is not None:
+            self.canonical_json_dumps = get_canonical_json_dumps()
+        # Body renderer for each export kind; other kinds are only listed in the TOC
+        self.export_renderers = {
+            "class": self.generate_class_docs,
+            "interface": self.generate_interface_docs,
+            "type": self.generate_type_docs,
+            "function": self.generate_function_docs,
+            "const": self.generate_const_docs,
+        }
+        self.member_renderers = {
+            "constructor": self.generate_constructor_docs,
+            "property": self.generate_property_docs,
+            "method": self.generate_method_docs,
+            "getter": self.generate_accessor_docs,
+            "setter": self.generate_accessor_docs,
+            "call-signature": self.generate_call_signature_docs,
+            "index-signature": self.generate_index_signature_docs,
+            "mapped-type": self.generate_mapped_type_docs,
+        }
 
     def get_default_config(self) -> Dict[str, Any]:
         """Default configuration for markdown generation."""
@@ -38,543 +152,431 @@ class MarkdownGenerator:
             "include_metadata": True,
         }
 
-    def generate(self) -> str:
-        """Generate the complete markdown document."""
-        sections = []
+    def generate(self) -> Optional[str]:
+        """Generate the complete markdown document into ``self.out``.
+
+        Returns the document when no output stream was supplied, otherwise None.
+        """
+        w = self.out.write
 
         # Title
         if self.config.get("title"):
-            sections.append(f"# {self.config['title']}\n")
+            w(f"# {self.config['title']}\n\n")
 
         # Metadata
         if self.config.get("include_metadata"):
             metadata = self.data.get("metadata", {})
             if "package" in metadata:
-                sections.append(f"*Package: {metadata['package']}*\n")
+                w(f"*Package: {metadata['package']}*\n\n")
             if "generated_at" in metadata:
-                sections.append(f"*Generated: {metadata['generated_at']}*\n")
+                w(f"*Generated: {metadata['generated_at']}*\n\n")
 
         # Introduction
-        sections.append(self.generate_introduction())
+        w(self.generate_introduction())
+
+        folders = self.data.get("folders", [])
 
         # Table of Contents
-        if self.config.get("include_toc"):
-            toc = self.generate_main_toc()
-            if toc:
-                sections.append("## Table of Contents\n")
-                sections.append(toc)
-                sections.append("\n---\n")
-
-        # Main content - iterate through folders
-        for folder in self.data.get("folders", []):
-            sections.append(self.generate_folder_section(folder))
+        if self.config.get("include_toc") and folders:
+            w("\n## Table of Contents\n\n")
+            self.generate_main_toc()
+            w("\n---\n")
+
+        # Main content - iterate through folders. Folders are independent, so
+        # large trees can be rendered in parallel; small ones aren't worth the
+        # pickling overhead, hence jobs defaults to 1.
+        if self.jobs > 1 and len(folders) > 1:
+            render = functools.partial(render_folder_section, config=self.config)
+            # The cache is handed to each worker once, not with every folder
+            with ProcessPoolExecutor(max_workers=self.jobs, initializer=set_worker_render_cache,
+                                     initargs=(self.render_cache,)) as executor:
+                for section, export_count, rendered in executor.map(render, folders, chunksize=1):
+                    w("\n")
+                    w(section)
+                    self.export_count += export_count
+                    self.rendered.update(rendered)
+        else:
+            for folder in folders:
+                w("\n")
+                self.generate_folder_section(folder)
 
-        return "\n".join(sections)
+        if isinstance(self.out, io.StringIO):
+            return self.out.getvalue()
+        return None
 
     def generate_introduction(self) -> str:
         """Generate introduction text."""
-        return """This document provides a comprehensive reference for all public APIs in the Aztec.js library.
+        return INTRODUCTION
 
-Each section is organized by module, with classes, interfaces, types, and functions documented with their full signatures, parameters, and return types.
-"""
+    def generate_main_toc(self) -> None:
+        """Generate the main table of contents.
 
-    def generate_main_toc(self) -> str:
-        """Generate the main table of contents."""
-        lines = []
+        The TOC precedes the body in the output, so when streaming it needs its
+        own (cheap) pass over folder/file/export names.
+        """
+        w = self.out.write
 
         for folder in self.data.get("folders", []):
             folder_name = folder.get("name", "")
             folder_path = folder.get("path", folder_name)  # Full path for nested folders
             folder_slug = self.slugify(folder_path)
-            folder_display = folder_path.replace('/', ' / ').title()
-            lines.append(f"- [{folder_display}](#{folder_slug})")
+            w(f"- [{self.folder_display(folder_path)}](#{folder_slug})\n")
 
-            # Add files as sub-items
+            # List the exports of each file as sub-items
             for file in folder.get("files", []):
                 file_name = file.get("name", "").replace(".ts", "")
-                file_slug = self.slugify(f"{folder_path}-{file_name}")
 
-                # List the exports for this file
                 for export in file.get("exports", []):
                     export_name = export.get("name", "")
                     export_slug = self.slugify(f"{folder_path}-{file_name}-{export_name}")
-                    lines.append(f"  - [{export_name}](#{export_slug})")
-
-        return "\n".join(lines)
+                    w(f"  - [{export_name}](#{export_slug})\n")
 
-    def generate_folder_section(self, folder: Dict[str, Any]) -> str:
+    def generate_folder_section(self, folder: Dict[str, Any]) -> None:
         """Generate documentation for a folder."""
+        w = self.out.write
         folder_name = folder.get("name", "")
         folder_path = folder.get("path", folder_name)  # Full path for nested folders
-        folder_slug = self.slugify(folder_path)
 
-        sections = []
-        # Use full path for nested directories, capitalize just the display
-        folder_display = folder_path.replace('/', ' / ').title()
-        sections.append(f"\n## {folder_display}\n")
+        w(f"\n## {self.folder_display(folder_path)}\n")
 
         # Folder description if available
         if "description" in folder:
-            sections.append(f"{folder['description']}\n")
+            w(f"\n{folder['description']}\n")
 
         # Generate documentation for each file
         for file in folder.get("files", []):
-            sections.append(self.generate_file_section(file, folder_path))
-
-        return "\n".join(sections)
+            w("\n")
+            self.generate_file_section(file)
 
-    def generate_file_section(self, file: Dict[str, Any], folder_name: str) -> str:
+    def generate_file_section(self, file: Dict[str, Any]) -> None:
         """Generate documentation for a file."""
-        file_name = file.get("name", "")
+        w = self.out.write
         file_path = file.get("path", "")
         exports = file.get("exports", [])
 
         # Skip if no exports
         if not exports:
-            return ""
-
-        sections = []
+            return
 
         # Add file-level separator and header (only if there are exports)
-        sections.append("\n---\n")
-        sections.append(f"### `{file_path}`\n")
+        w("\n---\n")
+        w(f"\n### `{file_path}`\n")
 
         # Generate documentation for each export
         for export in exports:
-            sections.append(self.generate_export_section(export, folder_name, file_name, file_path))
-
-        return "\n".join(sections)
+            w("\n")
+            self.generate_export_section(export)
 
-    def generate_export_section(self, export: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
+    def generate_export_section(self, export: Dict[str, Any]) -> None:
         """Generate documentation for an export (class, interface, type, function)."""
-        kind = export.get("kind", "")
-        name = export.get("name", "")
-
-        if kind == "class":
-            return self.generate_class_docs(export, folder_name, file_name, file_path)
-        elif kind == "interface":
-            return self.generate_interface_docs(export, folder_name, file_name, file_path)
-        elif kind == "type":
-            return self.generate_type_docs(export, folder_name, file_name, file_path)
-        elif kind == "function":
-            return self.generate_function_docs(export, folder_name, file_name, file_path)
-        elif kind == "const":
-            return self.generate_const_docs(export, folder_name, file_name, file_path)
-        else:
-            return ""
-
-    def generate_class_docs(self, cls: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
+        self.export_count += 1
+        renderer = self.export_renderers.get(export.get("kind", ""))
+        if not renderer:
+            return
+        if self.render_cache is None:
+            renderer(export)
+            return
+
+        key = self.export_cache_key(export)
+        fragment = self.render_cache.get(key)
+        if fragment is None:
+            # Render into a scratch buffer so the fragment can be cached
+            out = self.out
+            self.out = io.StringIO()
+            try:
+                renderer(export)
+                fragment = self.out.getvalue()
+            finally:
+                self.out = out
+        self.rendered[key] = fragment
+        self.out.write(fragment)
+
+    def export_cache_key(self, export: Dict[str, Any]) -> str:
+        """Hash an export's content (excluding derived fields) into a render cache key."""
+        fields = {k: v for k, v in export.items() if k != "_by_kind"}
+        return hashlib.blake2b(self.canonical_json_dumps(fields), digest_size=16).hexdigest()
+
+    def generate_class_docs(self, cls: Dict[str, Any]) -> None:
         """Generate documentation for a class."""
-        name = cls.get("name", "")
-        file_name_no_ext = file_name.replace(".ts", "")
-        slug = self.slugify(f"{folder_name}-{file_name_no_ext}-{name}")
-
-        sections = []
-        sections.append(f"\n#### {name}\n")
-        sections.append(f"**Type:** Class\n")
-
-        # Description
-        jsdoc = cls.get("jsdoc", {})
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        w = self.out.write
+        g = cls.get
+        self.generate_export_header(cls)
 
         # Heritage
-        extends = cls.get("extends", [])
-        implements = cls.get("implements", [])
+        extends = g("extends", [])
+        implements = g("implements", [])
 
         if extends:
-            sections.append(f"**Extends:** {', '.join(f'`{e}`' for e in extends)}\n")
+            w(f"\n**Extends:** {', '.join(f'`{e}`' for e in extends)}\n")
         if implements:
-            sections.append(f"**Implements:** {', '.join(f'`{i}`' for i in implements)}\n")
-
-        # Members
-        members = cls.get("members", [])
-        if members:
-            # Group members by kind
-            constructors = [m for m in members if m and m.get("kind") == "constructor"]
-            properties = [m for m in members if m and m.get("kind") == "property"]
-            methods = [m for m in members if m and m.get("kind") == "method"]
-            getters = [m for m in members if m and m.get("kind") == "getter"]
-            setters = [m for m in members if m and m.get("kind") == "setter"]
-
-            # Constructor
-            if constructors:
-                sections.append("\n#### Constructor\n")
-                for constructor in constructors:
-                    sections.append(self.generate_constructor_docs(constructor))
-
-            # Properties
-            if properties:
-                sections.append("\n#### Properties\n")
-                for prop in properties:
-                    sections.append(self.generate_property_docs(prop))
-
-            # Methods
-            if methods:
-                sections.append("\n#### Methods\n")
-                for method in methods:
-                    sections.append(self.generate_method_docs(method))
-
-            # Getters
-            if getters:
-                sections.append("\n#### Getters\n")
-                for getter in getters:
-                    sections.append(self.generate_accessor_docs(getter))
-
-            # Setters
-            if setters:
-                sections.append("\n#### Setters\n")
-                for setter in setters:
-                    sections.append(self.generate_accessor_docs(setter))
-
-        return "\n".join(sections)
-
-    def generate_interface_docs(self, iface: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
-        """Generate documentation for an interface."""
-        name = iface.get("name", "")
-        file_name_no_ext = file_name.replace(".ts", "")
-        slug = self.slugify(f"{folder_name}-{file_name_no_ext}-{name}")
+            w(f"\n**Implements:** {', '.join(f'`{i}`' for i in implements)}\n")
 
-        sections = []
-        sections.append(f"\n#### {name}\n")
-        sections.append(f"**Type:** Interface\n")
+        self.generate_member_sections(cls, CLASS_MEMBER_SECTIONS)
 
-        # Description
-        jsdoc = iface.get("jsdoc", {})
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+    def generate_interface_docs(self, iface: Dict[str, Any]) -> None:
+        """Generate documentation for an interface."""
+        w = self.out.write
+        g = iface.get
+        self.generate_export_header(iface)
 
         # Extends
-        extends = iface.get("extends", [])
+        extends = g("extends", [])
         if extends:
-            sections.append(f"**Extends:** {', '.join(f'`{e}`' for e in extends)}\n")
-
-        # Members
-        members = iface.get("members", [])
-        if members:
-            # Group members by kind
-            properties = [m for m in members if m and m.get("kind") == "property"]
-            methods = [m for m in members if m and m.get("kind") == "method"]
-            call_sigs = [m for m in members if m and m.get("kind") == "call-signature"]
-
-            # Properties
-            if properties:
-                sections.append("\n#### Properties\n")
-                for prop in properties:
-                    sections.append(self.generate_property_docs(prop))
-
-            # Methods
-            if methods:
-                sections.append("\n#### Methods\n")
-                for method in methods:
-                    sections.append(self.generate_method_docs(method))
-
-            # Call signatures
-            if call_sigs:
-                sections.append("\n#### Call Signatures\n")
-                for sig in call_sigs:
-                    sections.append(self.generate_call_signature_docs(sig))
-
-        return "\n".join(sections)
-
-    def generate_type_docs(self, type_alias: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
-        """Generate documentation for a type alias."""
-        name = type_alias.get("name", "")
-        signature = type_alias.get("signature", "")
-        jsdoc = type_alias.get("jsdoc", {})
-        members = type_alias.get("members", [])
+            w(f"\n**Extends:** {', '.join(f'`{e}`' for e in extends)}\n")
 
-        sections = []
-        sections.append(f"\n#### {name}\n")
-        sections.append(f"**Type:** Type Alias\n")
+        self.generate_member_sections(iface, INTERFACE_MEMBER_SECTIONS)
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+    def generate_type_docs(self, type_alias: Dict[str, Any]) -> None:
+        """Generate documentation for a type alias."""
+        w = self.out.write
+        g = type_alias.get
+        self.generate_export_header(type_alias)
 
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("\n**Signature:**\n")
+        w(f"\n```typescript\n{g('signature', '')}\n```")
 
         # Type members (for object-like types)
-        if members:
-            # Group members by kind
-            properties = [m for m in members if m and m.get("kind") == "property"]
-            methods = [m for m in members if m and m.get("kind") == "method"]
-            call_sigs = [m for m in members if m and m.get("kind") == "call-signature"]
-            index_sigs = [m for m in members if m and m.get("kind") == "index-signature"]
-            mapped_types = [m for m in members if m and m.get("kind") == "mapped-type"]
-
-            has_section_header = False
-
-            # Properties
-            if properties:
-                sections.append("\n**Type Members:**\n")
-                has_section_header = True
-                for prop in properties:
-                    sections.append(self.generate_property_docs(prop).lstrip('\n'))
-
-            # Methods
-            if methods:
-                if not has_section_header:
-                    sections.append("\n**Type Members:**\n")
-                    has_section_header = True
-                for method in methods:
-                    sections.append(self.generate_method_docs(method).lstrip('\n'))
-
-            # Index signatures
-            if index_sigs:
-                if not has_section_header:
-                    sections.append("\n**Type Members:**\n")
-                    has_section_header = True
-                for sig in index_sigs:
-                    sections.append(self.generate_index_signature_docs(sig).lstrip('\n'))
-
-            # Mapped types
-            if mapped_types:
-                if not has_section_header:
-                    sections.append("\n**Type Members:**\n")
-                    has_section_header = True
-                for mapped in mapped_types:
-                    sections.append(self.generate_mapped_type_docs(mapped).lstrip('\n'))
-
-            # Call signatures
-            if call_sigs:
-                if not has_section_header:
-                    sections.append("\n**Type Members:**\n")
-                for sig in call_sigs:
-                    sections.append(self.generate_call_signature_docs(sig).lstrip('\n'))
-
-        return "\n".join(sections)
-
-    def generate_function_docs(self, func: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
+        self.generate_member_sections(type_alias, TYPE_MEMBER_SECTIONS, heading=TYPE_MEMBERS_HEADING)
+
+    def generate_export_header(self, export: Dict[str, Any]) -> None:
+        """Generate the heading, type line and description shared by all exports."""
+        w = self.out.write
+        g = export.get
+        w(f"\n#### {g('name', '')}\n")
+        w(EXPORT_TYPE_LINES[g("kind")])
+
+        description = g("jsdoc", _EMPTY).get("description")
+        if description:
+            w(f"\n{description}\n")
+
+    def generate_member_sections(self, export: Dict[str, Any], sections: MemberSections,
+                                 heading: Optional[str] = None) -> None:
+        """Generate documentation for an export's members, grouped by kind in the order of ``sections``.
+
+        Each ``(kind, subheading)`` group is written under its own subheading,
+        with a blank line before each member heading. If ``heading`` is given
+        the groups are instead listed back to back under that single heading.
+        Uses the ``_by_kind`` buckets from index_members_by_kind when present.
+        """
+        groups = export.get("_by_kind")
+        if groups is None:
+            members = export.get("members")
+            if not members:
+                return
+            groups = group_members_by_kind(members)
+
+        w = self.out.write
+        renderers = self.member_renderers
+
+        if heading and any(kind in groups for kind, _ in sections):
+            w(heading)
+
+        for kind, subheading in sections:
+            group = groups.get(kind)
+            if not group:
+                continue
+            render = renderers[kind]
+            separator = "\n"
+            if subheading:
+                w(subheading)
+                if kind not in HEADLESS_MEMBER_KINDS:
+                    separator = "\n\n"
+            for member in group:
+                w(separator)
+                render(member)
+
+    def generate_function_docs(self, func: Dict[str, Any]) -> None:
         """Generate documentation for a function."""
-        name = func.get("name", "")
-        signature = func.get("signature", "")
-        jsdoc = func.get("jsdoc", {})
-        parameters = func.get("parameters", [])
-        return_type = func.get("returnType", "")
-        return_description = func.get("returnDescription", "")
-
-        sections = []
-        sections.append(f"\n#### {name}\n")
-        sections.append(f"**Type:** Function\n")
+        w = self.out.write
+        g = func.get
+        signature = g("signature", "")
+        parameters = g("parameters", [])
+        return_type = g("returnType", "")
+        return_description = g("returnDescription", "")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        self.generate_export_header(func)
 
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("\n**Signature:**\n")
+        w(f"\n```typescript\n{signature}\n```")
 
         # Parameters
         if parameters:
-            sections.append(self.generate_parameters_table(parameters))
+            w("\n")
+            self.generate_parameters_table(parameters)
 
         # Returns
         if return_type and return_type != "void":
-            sections.append(self.format_return_type(return_type, return_description))
+            w("\n")
+            self.format_return_type(return_type, return_description)
 
-        return "\n".join(sections)
-
-    def generate_const_docs(self, const: Dict[str, Any], folder_name: str, file_name: str, file_path: str) -> str:
+    def generate_const_docs(self, const: Dict[str, Any]) -> None:
         """Generate documentation for a const."""
-        name = const.get("name", "")
-        signature = const.get("signature", "")
-        jsdoc = const.get("jsdoc", {})
+        w = self.out.write
         const_type = const.get("type", "")
 
-        sections = []
-        sections.append(f"\n#### {name}\n")
-        sections.append(f"**Type:** Constant\n")
-
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        self.generate_export_header(const)
 
         if const_type:
-            sections.append(f"**Value Type:** `{const_type}`\n")
-
-        return "\n".join(sections)
+            w(f"\n**Value Type:** `{const_type}`\n")
 
-    def generate_constructor_docs(self, constructor: Dict[str, Any]) -> str:
+    def generate_constructor_docs(self, constructor: Dict[str, Any]) -> None:
         """Generate documentation for a constructor."""
-        signature = constructor.get("signature", "")
-        jsdoc = constructor.get("jsdoc", {})
-        parameters = constructor.get("parameters", [])
+        w = self.out.write
+        g = constructor.get
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        parameters = g("parameters", [])
 
-        sections = []
+        if description:
+            w(f"{description}\n\n")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
-
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("**Signature:**\n")
+        w(f"\n```typescript\n{signature}\n```")
 
         if parameters:
-            sections.append(self.generate_parameters_table(parameters))
-
-        return "\n".join(sections)
+            w("\n")
+            self.generate_parameters_table(parameters)
 
-    def generate_property_docs(self, prop: Dict[str, Any]) -> str:
+    def generate_property_docs(self, prop: Dict[str, Any]) -> None:
         """Generate documentation for a property."""
-        name = prop.get("name", "")
-        prop_type = prop.get("type", "")
-        signature = prop.get("signature", "")
-        jsdoc = prop.get("jsdoc", {})
-        is_readonly = prop.get("readonly", False)
-        is_static = prop.get("static", False)
-        is_optional = prop.get("optional", False)
-
-        sections = []
-        sections.append(f"\n##### {name}\n")
+        w = self.out.write
+        g = prop.get
+        name = g("name", "")
+        prop_type = g("type", "")
+        description = g("jsdoc", _EMPTY).get("description")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        w(f"##### {name}\n")
 
-        sections.append(f"**Type:** `{prop_type}`\n")
+        if description:
+            w(f"\n{description}\n")
 
-        return "\n".join(sections)
+        w(f"\n**Type:** `{prop_type}`\n")
 
-    def generate_method_docs(self, method: Dict[str, Any]) -> str:
+    def generate_method_docs(self, method: Dict[str, Any]) -> None:
         """Generate documentation for a method."""
-        name = method.get("name", "")
-        signature = method.get("signature", "")
-        jsdoc = method.get("jsdoc", {})
-        parameters = method.get("parameters", [])
-        return_type = method.get("returnType", "")
-        return_description = method.get("returnDescription", "")
-        is_static = method.get("static", False)
-        is_async = method.get("async", False)
+        w = self.out.write
+        g = method.get
+        name = g("name", "")
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        parameters = g("parameters", [])
+        return_type = g("returnType", "")
+        return_description = g("returnDescription", "")
 
-        sections = []
-        sections.append(f"\n##### {name}\n")
+        w(f"##### {name}\n")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        if description:
+            w(f"\n{description}\n")
 
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("\n**Signature:**\n")
+        w(f"\n```typescript\n{signature}\n```")
 
         # Parameters
         if parameters:
-            sections.append(self.generate_parameters_table(parameters))
+            w("\n")
+            self.generate_parameters_table(parameters)
 
         # Returns
         if return_type:
-            sections.append(self.format_return_type(return_type, return_description))
+            w("\n")
+            self.format_return_type(return_type, return_description)
 
-        return "\n".join(sections)
-
-    def generate_accessor_docs(self, accessor: Dict[str, Any]) -> str:
+    def generate_accessor_docs(self, accessor: Dict[str, Any]) -> None:
         """Generate documentation for a getter/setter."""
-        name = accessor.get("name", "")
-        kind = accessor.get("kind", "")
-        signature = accessor.get("signature", "")
-        jsdoc = accessor.get("jsdoc", {})
-        parameters = accessor.get("parameters", [])
-        return_type = accessor.get("returnType", "")
+        w = self.out.write
+        g = accessor.get
+        name = g("name", "")
+        kind = g("kind", "")
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        parameters = g("parameters", [])
+        return_type = g("returnType", "")
 
-        sections = []
-        sections.append(f"\n##### {name} ({kind})\n")
+        w(f"##### {name} ({kind})\n")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        if description:
+            w(f"\n{description}\n")
 
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("\n**Signature:**\n")
+        w(f"\n```typescript\n{signature}\n```")
 
         if parameters:
-            sections.append(self.generate_parameters_table(parameters))
+            w("\n")
+            self.generate_parameters_table(parameters)
 
         if return_type and kind == "getter":
-            sections.append(f"\n**Returns:** `{return_type}`")
-
-        return "\n".join(sections)
+            w(f"\n\n**Returns:** `{return_type}`")
 
-    def generate_call_signature_docs(self, sig: Dict[str, Any]) -> str:
+    def generate_call_signature_docs(self, sig: Dict[str, Any]) -> None:
         """Generate documentation for a call signature."""
-        signature = sig.get("signature", "")
-        jsdoc = sig.get("jsdoc", {})
-        parameters = sig.get("parameters", [])
-        return_type = sig.get("returnType", "")
-        return_description = sig.get("returnDescription", "")
-
-        sections = []
+        w = self.out.write
+        g = sig.get
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        parameters = g("parameters", [])
+        return_type = g("returnType", "")
+        return_description = g("returnDescription", "")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        if description:
+            w(f"{description}\n\n")
 
-        sections.append("**Signature:**\n")
-        sections.append(f"```typescript\n{signature}\n```")
+        w("**Signature:**\n")
+        w(f"\n```typescript\n{signature}\n```")
 
         if parameters:
-            sections.append(self.generate_parameters_table(parameters))
+            w("\n")
+            self.generate_parameters_table(parameters)
 
         if return_type:
-            sections.append(self.format_return_type(return_type, return_description))
+            w("\n")
+            self.format_return_type(return_type, return_description)
 
-        return "\n".join(sections)
-
-    def generate_index_signature_docs(self, sig: Dict[str, Any]) -> str:
+    def generate_index_signature_docs(self, sig: Dict[str, Any]) -> None:
         """Generate documentation for an index signature."""
-        name = sig.get("name", "")
-        signature = sig.get("signature", "")
-        jsdoc = sig.get("jsdoc", {})
-        value_type = sig.get("type", "any")
-
-        sections = []
-        sections.append(f"\n##### {name}\n")
+        w = self.out.write
+        g = sig.get
+        name = g("name", "")
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        value_type = g("type", "any")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        w(f"##### {name}\n")
 
-        sections.append(f"**Signature:** `{signature}`\n")
-        sections.append(f"**Value Type:** `{value_type}`\n")
+        if description:
+            w(f"\n{description}\n")
 
-        return "\n".join(sections)
+        w(f"\n**Signature:** `{signature}`\n")
+        w(f"\n**Value Type:** `{value_type}`\n")
 
-    def generate_mapped_type_docs(self, mapped: Dict[str, Any]) -> str:
+    def generate_mapped_type_docs(self, mapped: Dict[str, Any]) -> None:
         """Generate documentation for a mapped type."""
-        name = mapped.get("name", "")
-        signature = mapped.get("signature", "")
-        jsdoc = mapped.get("jsdoc", {})
-        value_type = mapped.get("type", "any")
-        key_type = mapped.get("keyType", "any")
-
-        sections = []
-        sections.append(f"\n##### {name}\n")
+        w = self.out.write
+        g = mapped.get
+        name = g("name", "")
+        signature = g("signature", "")
+        description = g("jsdoc", _EMPTY).get("description")
+        value_type = g("type", "any")
+        key_type = g("keyType", "any")
 
-        if jsdoc.get("description"):
-            sections.append(f"{jsdoc['description']}\n")
+        w(f"##### {name}\n")
 
-        sections.append(f"**Signature:** `{signature}`\n")
-        sections.append(f"**Key Type:** `{key_type}`\n")
-        sections.append(f"**Value Type:** `{value_type}`\n")
+        if description:
+            w(f"\n{description}\n")
 
-        return "\n".join(sections)
+        w(f"\n**Signature:** `{signature}`\n")
+        w(f"\n**Key Type:** `{key_type}`\n")
+        w(f"\n**Value Type:** `{value_type}`\n")
 
-    def generate_parameters_table(self, parameters: List[Dict[str, Any]]) -> str:
+    def generate_parameters_table(self, parameters: List[Dict[str, Any]]) -> None:
         """Generate a markdown table for parameters."""
         if not parameters:
-            return ""
-
-        sections = []
-        sections.append("\n**Parameters:**\n")
-
-        for param in parameters:
-            name = param.get("name", "")
-            param_type = param.get("type", "")
-            is_optional = param.get("optional", False)
-            description = param.get("description", "")
-
-            param_name = f"`{name}`"
-            if is_optional:
-                param_name += " (optional)"
+            return
 
-            sections.append(f"- {param_name}: `{param_type}`")
-            if description:
-                sections.append(f"  - {description}")
+        w = self.out.write
+        w("\n**Parameters:**\n")
+        w("".join(map(format_parameter, parameters)))
 
-        return "\n".join(sections)
-
-    def format_return_type(self, return_type: str, return_description: str = "") -> str:
+    def format_return_type(self, return_type: str, return_description: str = "") -> None:
         """
         Format a return type for markdown documentation.
         Uses code blocks for multi-line types to avoid MDX parsing issues with braces.
@@ -582,65 +584,205 @@ Each section is organized by module, with classes, interfaces, types, and functi
         Args:
             return_type: The return type string
             return_description: Optional description of the return value
-
-        Returns:
-            Formatted markdown string for the return type section
         """
         if not return_type:
-            return ""
+            return
 
-        sections = []
-        sections.append("\n**Returns:**\n")
+        w = self.out.write
 
-        # Use code block for multi-line types to avoid MDX parsing issues
+        # Each case is written as one fragment. Use code block for multi-line
+        # types to avoid MDX parsing issues
         if '\n' in return_type:
-            sections.append(f"```typescript\n{return_type}\n```")
             if return_description:
-                sections.append(f"\n{return_description}")
+                w(f"\n**Returns:**\n\n```typescript\n{return_type}\n```\n\n{return_description}")
+            else:
+                w(f"\n**Returns:**\n\n```typescript\n{return_type}\n```")
+        elif return_description:
+            w(f"\n**Returns:**\n\n`{return_type}` - {return_description}")
         else:
-            return_line = f"`{return_type}`"
-            if return_description:
-                return_line += f" - {return_description}"
-            sections.append(return_line)
+            w(f"\n**Returns:**\n\n`{return_type}`")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def folder_display(folder_path: str) -> str:
+        """Display name of a folder: its full path (for nested directories), capitalized.
+
+        Memoized, as both the TOC and the folder section show it.
+        """
+        return folder_path.replace('/', ' / ').title()
 
-        return "\n".join(sections)
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def slugify(text: str) -> str:
+        """Convert text to a markdown-friendly anchor.
 
-    def slugify(self, text: str) -> str:
-        """Convert text to a markdown-friendly anchor."""
+        Memoized, as it is a pure function of its input and anchors for the
+        same paths are requested repeatedly.
+        """
         # Convert to lowercase and replace spaces/special chars with hyphens
-        slug = text.lower()
-        slug = slug.replace(" ", "-")
-        slug = slug.replace("/", "-")
-        slug = slug.replace(".", "-")
-        slug = slug.replace("_", "-")
+        slug = text.lower().translate(_SLUG_SEPARATORS)
         # Remove any other special characters
-        slug = ''.join(c for c in slug if c.isalnum() or c == '-')
+        slug = _SLUG_DISALLOWED.sub('', slug)
         # Remove consecutive hyphens
-        while '--' in slug:
-            slug = slug.replace('--', '-')
+        slug = _SLUG_HYPHEN_RUNS.sub('-', slug)
         return slug.strip('-')
 
 
+def group_members_by_kind(members: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Bucket members by their kind in a single pass, skipping empty entries."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for member in members:
+        if member:
+            groups.setdefault(member.get("kind"), []).append(member)
+    return groups
+
+
+def index_members_by_kind(data: Dict[str, Any]) -> None:
+    """Annotate every export that has members with its ``_by_kind`` buckets.
+
+    Run once after loading so that renderers look groups up instead of
+    re-partitioning the member lists each time an export is rendered.
+    """
+    for folder in data.get("folders", []):
+        for file in folder.get("files", []):
+            for export in file.get("exports", []):
+                members = export.get("members")
+                if members:
+                    export["_by_kind"] = group_members_by_kind(members)
+
+
+# Render cache of a process pool worker, set once by its initializer
+_worker_render_cache: Optional[Dict[str, str]] = None
+
+
+def set_worker_render_cache(render_cache: Optional[Dict[str, str]]) -> None:
+    """Process pool initializer: install the render cache for this worker."""
+    global _worker_render_cache
+    _worker_render_cache = render_cache
+
+
+def render_folder_section(folder: Dict[str, Any], config: Dict[str, Any] = None) -> Tuple[str, int, Dict[str, str]]:
+    """Render a single folder section to a string (process pool worker).
+
+    Returns the markdown, the number of exports it documents and the render
+    cache entries it used.
+    """
+    generator = MarkdownGenerator({"folders": [folder]}, config, render_cache=_worker_render_cache)
+    generator.generate_folder_section(folder)
+    return generator.out.getvalue(), generator.export_count, generator.rendered
+
+
+def renderer_version() -> str:
+    """Identify this version of the renderer, so cached output from older code is discarded."""
+    return hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).hexdigest()
+
+
+def load_render_cache(cache_path: str) -> Dict[str, str]:
+    """Load rendered export fragments saved by a previous --cache run.
+
+    Returns an empty cache if the file is missing, unreadable or was written by
+    a different version of this script.
+    """
+    try:
+        cache = json.loads(Path(cache_path).read_bytes())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != renderer_version():
+        return {}
+    return cache.get("entries", {})
+
+
+def save_render_cache(cache_path: str, entries: Dict[str, str]) -> None:
+    """Save rendered export fragments for the next --cache run."""
+    with open(cache_path, 'w') as f:
+        json.dump({"version": renderer_version(), "entries": entries}, f)
+
+
+def get_yaml_loads() -> Optional[Callable[[bytes], Any]]:
+    """Import PyYAML on demand and return a YAML parser, or None if it isn't installed.
+
+    Prefers the libyaml-backed loader, which is several times faster than the
+    pure-Python SafeLoader that yaml.safe_load uses.
+    """
+    try:
+        import yaml
+    except ImportError:
+        return None
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+    return functools.partial(yaml.load, Loader=Loader)
+
+
+def get_json_loads() -> Callable[[Buffer], Any]:
+    """Return orjson's parser when installed, otherwise the stdlib one.
+
+    orjson parses straight from bytes (or a memoryview of a mapped file) and is
+    considerably faster on large API dumps; its JSONDecodeError subclasses
+    json.JSONDecodeError.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return stdlib_json_loads
+    return orjson.loads
+
+
+def get_canonical_json_dumps() -> Callable[[Any], bytes]:
+    """Return a serializer producing key-sorted JSON bytes, using orjson when installed."""
+    try:
+        import orjson
+    except ImportError:
+        # Same compact, non-ASCII-escaping layout as orjson, so keys match
+        return lambda obj: json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return functools.partial(orjson.dumps, option=orjson.OPT_SORT_KEYS)
+
+
+def stdlib_json_loads(content: Buffer) -> Any:
+    """json.loads for bytes or memoryviews (bytes() is a no-op for bytes input)."""
+    return json.loads(bytes(content))
+
+
 def load_input_file(file_path: str) -> Dict[str, Any]:
-    """Load JSON or YAML input file."""
-    with open(file_path, 'r') as f:
-        content = f.read()
+    """Load JSON or YAML input file.
+
+    The file is read as raw bytes so the parser does its own UTF-8 decoding,
+    and inputs of MMAP_THRESHOLD bytes or more are memory-mapped rather than
+    copied into memory.
+    """
+    path = Path(file_path)
+    if path.stat().st_size < MMAP_THRESHOLD:
+        return parse_input(file_path, path.read_bytes())
+
+    with open(file_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+            memoryview(mapped) as view:
+        return parse_input(file_path, view)
+
+
+def parse_input(file_path: str, content: Buffer) -> Dict[str, Any]:
+    """Parse input file contents as JSON or YAML.
 
+    Parser modules are only imported for the format actually being read.
+    """
     # Try to determine format from extension
     if file_path.endswith('.yaml') or file_path.endswith('.yml'):
-        if not YAML_AVAILABLE:
+        yaml_loads = get_yaml_loads()
+        if yaml_loads is None:
             print("Error: PyYAML is required for YAML support. Install with: pip install pyyaml")
             exit(1)
-        return yaml.safe_load(content)
+        return yaml_loads(bytes(content))
     elif file_path.endswith('.json'):
-        return json.loads(content)
+        return get_json_loads()(content)
     else:
         # Try JSON first, then YAML
         try:
-            return json.loads(content)
+            return get_json_loads()(content)
         except json.JSONDecodeError:
-            if YAML_AVAILABLE:
-                return yaml.safe_load(content)
+            yaml_loads = get_yaml_loads()
+            if yaml_loads is not None:
+                return yaml_loads(bytes(content))
             else:
                 print("Error: Could not parse input file. Install PyYAML for YAML support.")
                 exit(1)
@@ -664,32 +806,49 @@ def main():
         "--title",
         help="Document title (overrides default)"
     )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes used to render folders (default: 1)"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse markdown rendered for unchanged exports, stored in <output>.cache"
+    )
 
     args = parser.parse_args()
 
     # Load input
     print(f"Loading input from {args.input}...")
     data = load_input_file(args.input)
+    index_members_by_kind(data)
 
     # Create config
     config = {}
     if args.title:
         config["title"] = args.title
 
+    cache_path = f"{args.output}.cache"
+    render_cache = load_render_cache(cache_path) if args.cache else None
+
     # Generate markdown
     print("Generating markdown documentation...")
-    generator = MarkdownGenerator(data, config)
-    markdown = generator.generate()
+    # Stream straight to the output file; a large buffer keeps the many small
+    # writes from turning into many small syscalls
+    with open(args.output, 'w', buffering=1 << 20) as f:
+        generator = MarkdownGenerator(data, config, out=f, jobs=args.jobs, render_cache=render_cache)
+        generator.generate()
 
-    # Write output
-    with open(args.output, 'w') as f:
-        f.write(markdown)
+    # Only keep the fragments used by this run, so stale entries don't pile up
+    if args.cache:
+        save_render_cache(cache_path, generator.rendered)
 
     print(f"Documentation written to: {args.output}")
 
     # Print statistics
-    total_exports = sum(len(file['exports']) for folder in data.get('folders', []) for file in folder.get('files', []))
-    print(f"Documented {len(data.get('folders', []))} modules with {total_exports} total exports")
+    print(f"Documented {len(data.get('folders', []))} modules with {generator.export_count} total exports")
 
 
 if __name__ == "__main__":
@@ -9,151 +9,221 @@ Checks for:
 - Missing required sections
 """
 
+import heapq
 import re
 import sys
+from bisect import insort
+from collections import namedtuple
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Tuple
 
+# Files larger than this are read line by line rather than in one go
+LARGE_FILE_BYTES = 50 * 1024 * 1024
+
+SEV_ERROR, SEV_WARNING, SEV_INFO = 0, 1, 2
+
+# Issues keep the values for their message and are only formatted when printed
+Issue = namedtuple('Issue', 'line severity code args')
+MESSAGES = {
+    'object_artifact': 'Found [object Object] artifact: {}',
+    'blank_lines': 'Excessive blank lines: {} consecutive blank lines starting at line {}',
+    'unclosed_code_block': 'Unclosed code block starting at line {}',
+    'skipped_heading': 'Skipped heading level: H{} → H{} at "{}"',
+    'missing_type_label': 'Section "{}" missing **Type:** label',
+    'missing_signature': 'Section "{}" missing **Signature:**',
+    'empty_section': 'Empty **{}:** section',
+    'double_dash': 'Double dash found: {}',
+}
+# Issues on the same line are reported in the order of their checks, as listed above
+CHECK_ORDER = {code: rank for rank, code in enumerate(MESSAGES)}
+
+OBJECT_ARTIFACT_PATTERN = re.compile(r'\[object object\]', re.IGNORECASE)
+TYPE_LABEL_PATTERN = re.compile(r'^\*\*Type:\*\*\s+(.+)$')
+SIGNATURE_PATTERN = re.compile(r'^\*\*Signature:\*\*')
+PARAM_PATTERN = re.compile(r'^\*\*Parameters:\*\*\s*$')
+RETURNS_PATTERN = re.compile(r'^\*\*Returns:\*\*\s*$')
+# Lines are stored without their newline, so "- -" may also end the line
+DOUBLE_DASH_PATTERN = re.compile(r'-\s+-(?:\s|$)')
+
+
+def format_issue(issue: Issue) -> str:
+    """Format an issue as a report line."""
+    return f"Line {issue.line}: {MESSAGES[issue.code].format(*issue.args)}"
+
 
 class DocVerifier:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.lines = []
-        self.issues = []
+        # Issues by severity, each in line order
+        self.errors = []
+        self.warnings = []
+        self.info = []
+        # Whether any line may have an artifact or double dash, for scan_lines
+        self.check_artifacts = True
+        self.check_dashes = True
 
     def load_file(self):
-        """Load the documentation file."""
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            self.lines = f.readlines()
+        """Load the documentation file.
+
+        Reads the whole file in one go, except for very large files, which are
+        split line by line so the full text and its lines aren't held at once.
+        When the whole text is read, [object Object] artifacts are found in one
+        pass over it, and double dashes, which are rare, are ruled out with one
+        search rather than checking every line.
+        """
+        path = Path(self.file_path)
+        if path.stat().st_size <= LARGE_FILE_BYTES:
+            text = path.read_text(encoding='utf-8', errors='replace')
+            self.lines = text.splitlines()
+            # Match offsets map to line numbers by counting newlines, so this
+            # needs the lines to be just the text's newline-separated ones; text
+            # with any of the rarer separators splitlines() splits on is checked
+            # line by line instead
+            if len(self.lines) == text.count('\n') + (1 if text and text[-1] != '\n' else 0):
+                self.find_artifacts(text)
+                self.check_artifacts = False
+            self.check_dashes = DOUBLE_DASH_PATTERN.search(text) is not None
+            return
 
-    def check_object_artifacts(self):
-        """Check for [object Object] patterns."""
-        for i, line in enumerate(self.lines, start=1):
-            if '[object Object]' in line or '[object object]' in line.lower():
-                self.issues.append((i, 'ERROR', f'Found [object Object] artifact: {line.strip()}'))
+        self.lines = []
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                # splitlines() also splits on the rarer separators and drops the
+                # newline, matching the whole-file path
+                self.lines.extend(line.splitlines())
+
+    def find_artifacts(self, text: str):
+        """Find [object Object] artifacts in one pass over the whole text."""
+        line_number = 1
+        offset = 0
+        for match in OBJECT_ARTIFACT_PATTERN.finditer(text):
+            if match.start() < offset:
+                continue  # Already reported this line
+            line_number += text.count('\n', offset, match.start())
+            offset = text.find('\n', match.end())
+            if offset < 0:
+                offset = len(text)
+            self.errors.append(Issue(line_number, SEV_ERROR, 'object_artifact', (self.lines[line_number - 1].strip(),)))
+
+    def scan_lines(self):
+        """Run all line checks in a single pass over the file.
+
+        Checks for [object Object] artifacts, excessive blank lines (3+
+        consecutive), unclosed code blocks, skipped heading levels (H1→H2→H3...),
+        Type/Interface/Class sections missing their **Type:** label or
+        **Signature:**, empty **Parameters:**/**Returns:** sections and double
+        dashes (- -) in descriptions.
+
+        Issues are found in line order, apart from the few only known after
+        their line has passed, which are merged or inserted into place.
+        """
+        errors = self.errors
+        warnings = self.warnings
+        # Missing **Type:** labels are only known once their section ends
+        section_warnings = []
+
+        # Unless load_file found or ruled them out for the whole text
+        check_artifacts = self.check_artifacts
+        check_dashes = self.check_dashes
 
-    def check_spacing(self):
-        """Check for excessive blank lines (3+ consecutive)."""
         consecutive_blank = 0
         blank_start = 0
+        in_code_block = False
+        code_block_start = 0
+        previous_level = 0
+        current_section = None
+        current_line = 0
+        has_type_label = False
+        has_signature = False
+        # (line, label) of a Parameters/Returns header, decided by the next non-blank line
+        pending_section = None
 
         for i, line in enumerate(self.lines, start=1):
-            if line.strip() == '':
+            stripped = line.strip()
+
+            # Blank lines can't trigger any other check
+            if not stripped:
                 if consecutive_blank == 0:
                     blank_start = i
                 consecutive_blank += 1
-            else:
-                if consecutive_blank >= 3:
-                    self.issues.append((blank_start, 'WARNING', f'Excessive blank lines: {consecutive_blank} consecutive blank lines starting at line {blank_start}'))
-                consecutive_blank = 0
+                continue
 
-    def check_code_blocks(self):
-        """Check that all code blocks are properly closed."""
-        in_code_block = False
-        code_block_start = 0
+            if check_artifacts and OBJECT_ARTIFACT_PATTERN.search(line):
+                errors.append(Issue(i, SEV_ERROR, 'object_artifact', (stripped,)))
 
-        for i, line in enumerate(self.lines, start=1):
-            if line.strip().startswith('```'):
+            # A Parameters/Returns header followed by another section or heading is empty
+            if pending_section:
+                if stripped.startswith(('**', '#')):
+                    section_line, label = pending_section
+                    warnings.append(Issue(section_line, SEV_WARNING, 'empty_section', (label,)))
+                pending_section = None
+
+            if consecutive_blank >= 3:
+                warnings.append(Issue(blank_start, SEV_WARNING, 'blank_lines', (consecutive_blank, blank_start)))
+            consecutive_blank = 0
+
+            if stripped.startswith('```'):
                 if in_code_block:
                     in_code_block = False
                 else:
                     in_code_block = True
                     code_block_start = i
 
-        if in_code_block:
-            self.issues.append((code_block_start, 'ERROR', f'Unclosed code block starting at line {code_block_start}'))
-
-    def check_heading_hierarchy(self):
-        """Check heading levels follow proper hierarchy (H1→H2→H3→H4→H5)."""
-        heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$')
-        previous_level = 0
-
-        for i, line in enumerate(self.lines, start=1):
-            match = heading_pattern.match(line)
-            if match:
-                current_level = len(match.group(1))
-                heading_text = match.group(2).strip()
-
-                # Skip the main title (H1)
-                if current_level == 1:
-                    previous_level = 1
-                    continue
-
-                # Check if we're skipping levels (e.g., H2 → H4)
-                if current_level > previous_level + 1 and previous_level > 0:
-                    self.issues.append((i, 'WARNING', f'Skipped heading level: H{previous_level} → H{current_level} at "{heading_text}"'))
-
-                previous_level = current_level
-
-    def check_section_structure(self):
-        """Check that Type/Interface/Class sections have required subsections."""
-        section_pattern = re.compile(r'^####\s+(.+)$')
-        type_label_pattern = re.compile(r'^\*\*Type:\*\*\s+(.+)$')
-        signature_pattern = re.compile(r'^\*\*Signature:\*\*')
-
-        current_section = None
-        current_line = 0
-        has_type_label = False
-        has_signature = False
-
-        for i, line in enumerate(self.lines, start=1):
-            # New H4 section (export)
-            if section_pattern.match(line):
-                # Check previous section
-                if current_section:
-                    if not has_type_label:
-                        self.issues.append((current_line, 'WARNING', f'Section "{current_section}" missing **Type:** label'))
-                    if not has_signature:
-                        self.issues.append((current_line, 'INFO', f'Section "{current_section}" missing **Signature:**'))
-
-                current_section = section_pattern.match(line).group(1).strip()
-                current_line = i
-                has_type_label = False
-                has_signature = False
-
-            # Check for type label
-            if type_label_pattern.match(line):
-                has_type_label = True
-
-            # Check for signature
-            if signature_pattern.match(line):
-                has_signature = True
-
-    def check_empty_sections(self):
-        """Check for empty parameter/returns sections."""
-        param_pattern = re.compile(r'^\*\*Parameters:\*\*\s*$')
-        returns_pattern = re.compile(r'^\*\*Returns:\*\*\s*$')
+            # Headings and the bold section labels are line prefixes, so other
+            # lines skip those patterns altogether
+            first = line[0]
+            if first == '#':
+                # A heading is 1-6 '#', whitespace and some text (^(#{1,6})\s+(.+)$),
+                # checked by hand as this runs for every '#' line
+                current_level = len(line) - len(line.lstrip('#'))
+                is_heading = current_level <= 6 and len(line) > current_level + 1 and line[current_level].isspace()
+
+                if is_heading:
+                    # Skip the main title (H1)
+                    if current_level == 1:
+                        previous_level = 1
+                    # Check if we're skipping levels (e.g., H2 → H4)
+                    else:
+                        if current_level > previous_level + 1 and previous_level > 0:
+                            warnings.append(Issue(i, SEV_WARNING, 'skipped_heading', (previous_level, current_level, line[current_level:].strip())))
+                        previous_level = current_level
+
+                # New H4 section (export)
+                if is_heading and current_level == 4:
+                    # Check previous section
+                    if current_section:
+                        if not has_type_label:
+                            section_warnings.append(Issue(current_line, SEV_WARNING, 'missing_type_label', (current_section,)))
+                        if not has_signature:
+                            self.info.append(Issue(current_line, SEV_INFO, 'missing_signature', (current_section,)))
+
+                    current_section = line[4:].strip()
+                    current_line = i
+                    has_type_label = False
+                    has_signature = False
+
+            elif first == '*':
+                if TYPE_LABEL_PATTERN.match(line):
+                    has_type_label = True
+
+                if SIGNATURE_PATTERN.match(line):
+                    has_signature = True
+
+                if PARAM_PATTERN.match(line):
+                    pending_section = (i, 'Parameters')
+                elif RETURNS_PATTERN.match(line):
+                    pending_section = (i, 'Returns')
+
+            if check_dashes and DOUBLE_DASH_PATTERN.search(line):
+                warnings.append(Issue(i, SEV_WARNING, 'double_dash', (stripped,)))
 
-        for i, line in enumerate(self.lines, start=1):
-            if param_pattern.match(line):
-                # Check if next non-empty line is another section or heading
-                next_idx = i
-                while next_idx < len(self.lines):
-                    next_line = self.lines[next_idx].strip()
-                    if next_line:
-                        if next_line.startswith('**') or next_line.startswith('#'):
-                            self.issues.append((i, 'WARNING', f'Empty **Parameters:** section'))
-                        break
-                    next_idx += 1
-
-            if returns_pattern.match(line):
-                # Check if next non-empty line is another section or heading
-                next_idx = i
-                while next_idx < len(self.lines):
-                    next_line = self.lines[next_idx].strip()
-                    if next_line:
-                        if next_line.startswith('**') or next_line.startswith('#'):
-                            self.issues.append((i, 'WARNING', f'Empty **Returns:** section'))
-                        break
-                    next_idx += 1
-
-    def check_double_dashes(self):
-        """Check for double dashes in descriptions (- -)."""
-        double_dash_pattern = re.compile(r'-\s+-\s+')
+        if in_code_block:
+            insort(errors, Issue(code_block_start, SEV_ERROR, 'unclosed_code_block', (code_block_start,)), key=itemgetter(0))
 
-        for i, line in enumerate(self.lines, start=1):
-            if double_dash_pattern.search(line):
-                self.issues.append((i, 'WARNING', f'Double dash found: {line.strip()}'))
+        # On a shared line, the label issue goes between a skipped heading and a double dash
+        self.warnings = list(heapq.merge(warnings, section_warnings, key=lambda issue: (issue.line, CHECK_ORDER[issue.code])))
 
     def verify_all(self):
         """Run all verification checks."""
@@ -161,32 +231,21 @@ class DocVerifier:
         print()
 
         self.load_file()
-
-        self.check_object_artifacts()
-        self.check_spacing()
-        self.check_code_blocks()
-        self.check_heading_hierarchy()
-        self.check_section_structure()
-        self.check_empty_sections()
-        self.check_double_dashes()
+        self.scan_lines()
 
         return self.report()
 
     def report(self) -> bool:
         """Print verification report and return True if no errors."""
-        if not self.issues:
+        errors = self.errors
+        warnings = self.warnings
+        info = self.info
+
+        if not (errors or warnings or info):
             print("✅ All checks passed! Documentation is production-ready.")
             return True
 
-        # Sort by line number
-        self.issues.sort(key=lambda x: x[0])
-
-        # Group by severity
-        errors = [i for i in self.issues if i[1] == 'ERROR']
-        warnings = [i for i in self.issues if i[1] == 'WARNING']
-        info = [i for i in self.issues if i[1] == 'INFO']
-
-        print(f"Found {len(self.issues)} issues:")
+        print(f"Found {len(errors) + len(warnings) + len(info)} issues:")
         print(f"  - {len(errors)} ERRORS")
         print(f"  - {len(warnings)} WARNINGS")
         print(f"  - {len(info)} INFO")
@@ -196,24 +255,24 @@ class DocVerifier:
             print("=" * 80)
             print("ERRORS (must fix):")
             print("=" * 80)
-            for line, severity, message in errors:
-                print(f"Line {line}: {message}")
+            for issue in errors:
+                print(format_issue(issue))
             print()
 
         if warnings:
             print("=" * 80)
             print("WARNINGS (should review):")
             print("=" * 80)
-            for line, severity, message in warnings:
-                print(f"Line {line}: {message}")
+            for issue in warnings:
+                print(format_issue(issue))
             print()
 
         if info:
             print("=" * 80)
             print("INFO (optional improvements):")
             print("=" * 80)
-            for line, severity, message in info:
-                print(f"Line {line}: {message}")
+            for issue in info:
+                print(format_issue(issue))
             print()
 
         return len(errors) == 0
@@ -11,47 +11,172 @@ import subprocess
 import json
 import re
 import argparse
+import datetime
+import functools
+import hashlib
 import os
-from typing import Dict, List, Optional, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 
 try:
     import yaml
     YAML_AVAILABLE = True
+    # The libyaml emitter is much faster when PyYAML was built with it
+    YAML_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
 except ImportError:
     YAML_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Deepest subcommand level that is scanned
+MAX_DEPTH = 5
+# Concurrent --help invocations; the work is waiting on subprocesses, not CPU
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+# Output is encoded in many small pieces; buffer them into large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# ESC[ followed by any number of digits/semicolons, ending with a letter
+# (matched on the raw bytes, so escape codes are dropped before decoding)
+ANSI_PATTERN = re.compile(rb'\x1b\[[0-9;]*[a-zA-Z]')
+# Help output containing any of these is a failed command, not help
+ERROR_MARKERS = (
+    "ERROR: cli Error in command execution",
+    "TypeError: Do not know how to serialize",
+    "TypeError:",
+    "Error:",
+    "at JSON.stringify",
+)
+# One alternation finds any marker in a single pass over the output
+ERROR_MARKER_PATTERN = re.compile('|'.join(map(re.escape, ERROR_MARKERS)))
+# Commander.js section headers, which sit on a line of their own
+SECTION_KEYWORDS = {
+    'Options:': 'options',
+    'Global Options:': 'options',
+    'Commands:': 'commands',
+    'Arguments:': 'commands',
+}
+# Commander.js option lines, e.g. "  -V, --version", "  --name <value>"
+COMMANDER_OPTION_PATTERN = re.compile(r'\s+(-[^,\s]+)?(?:,\s+)?(--[^\s]+(?:\s+<[^>]+>)?)\s+(.*)')
+# Commander.js pads command signatures to a fixed column width
+COLUMN_GAP_PATTERN = re.compile(r'\s{2,}')
+# Custom help format (e.g. 'aztec start')
+CUSTOM_SECTION_PATTERN = re.compile(r'^\s{2}([A-Z][A-Z\s]+?)\s*$')
+CUSTOM_SECTION_HEADER_PATTERN = re.compile(r'^\s{2}[A-Z][A-Z\s]+$', re.MULTILINE)
+CUSTOM_OPTION_PATTERN = re.compile(r'^\s+(--.+?)\s{2,}')
+CUSTOM_DEFAULT_PATTERN = re.compile(r'\(default:\s*([^)]+)\)')
+CUSTOM_ENV_PATTERN = re.compile(r'\(\$([^)]+)\)')
+CUSTOM_DESCRIPTION_PATTERN = re.compile(r'^\s{10,}(.+)')
+
+
+@functools.lru_cache(maxsize=2048)
+def parse_commander_option(line: str) -> Optional[Tuple[str, str, str]]:
+    """Split a Commander.js option line into (short flag, long flag, description).
+
+    The usual "  -V, --version <arg>  description" layout is handled by plain
+    token splitting; anything else falls back to COMMANDER_OPTION_PATTERN, which
+    defines the accepted format. Returns None if the line isn't an option.
+
+    Results are cached, as shared options (--log-level, --help, ...) repeat the
+    same line in every command's help.
+    """
+    if line[:1].isspace():
+        token, rest = split_first_token(line)
+        short_flag = ""
+        if len(token) > 2 and token[0] == '-' and token.find(',') == len(token) - 1:
+            short_flag = token[:-1]
+            token, rest = split_first_token(rest)
+
+        if len(token) > 2 and token.startswith('--'):
+            long_flag = token
+            valid = True
+            if rest.startswith('<'):
+                arg, rest = split_first_token(rest)
+                long_flag = f"{token} {arg}"
+                valid = len(arg) > 2 and arg.find('>') == len(arg) - 1 and long_flag in line
+            # Lines without a description are left to the pattern, which
+            # handles trailing whitespace and arguments that aren't flags
+            if valid and rest:
+                return short_flag, long_flag, rest.strip()
+
+    option_match = COMMANDER_OPTION_PATTERN.match(line)
+    if option_match:
+        return option_match.group(1) or "", option_match.group(2), option_match.group(3).strip()
+    return None
+
+
+def split_first_token(text: str) -> Tuple[str, str]:
+    """Split off the first whitespace-delimited token, returning (token, rest)."""
+    parts = text.split(None, 1)
+    if not parts:
+        return "", ""
+    if len(parts) == 1:
+        return parts[0], ""
+    return parts[0], parts[1]
+
 
 class CLIScanner:
     """Recursively scans a CLI command tree and extracts help information."""
 
-    def __init__(self, base_command: str = "aztec"):
+    def __init__(self, base_command: str = "aztec", jobs: int = DEFAULT_JOBS):
         self.base_command = base_command
+        self.jobs = jobs
+        self.executor: Optional[ThreadPoolExecutor] = None  # Only set while scanning with jobs > 1
+        # Set a large terminal width to prevent output truncation; built once
+        # and shared by every command, subprocess doesn't modify it
+        self.env = {**os.environ, 'COLUMNS': '200'}
         self.visited = set()  # Track visited commands to avoid loops
-        self.help_cache = {}  # Cache help output to detect duplicates
+        self.help_cache: Dict[bytes, str] = {}  # Help output hash -> first command that printed it
+        self.output_cache: Dict[Tuple[str, ...], Future] = {}  # Command output, so nothing is spawned twice
 
     def run_command(self, cmd: List[str]) -> Optional[str]:
-        """Execute a command and return its output."""
+        """Execute a command and return its output.
+
+        The CLI has no long-lived mode to stream requests to, so each command
+        costs a process start; outputs (including failures) are cached by
+        command so that cost is paid at most once per command.
+        """
+        return self.start_command(cmd).result()
+
+    def start_command(self, cmd: List[str]) -> Future:
+        """Return a future for a command's output, starting it if it hasn't run yet.
+
+        With a thread pool the command runs in the background; otherwise it
+        runs immediately and the returned future is already done.
+        """
+        key = tuple(cmd)
+        future = self.output_cache.get(key)
+        if future is None:
+            if self.executor:
+                future = self.executor.submit(self._run_command, cmd)
+            else:
+                future = Future()
+                future.set_result(self._run_command(cmd))
+            self.output_cache[key] = future
+        return future
+
+    def _run_command(self, cmd: List[str]) -> Optional[str]:
+        """Spawn a command and return its combined, ANSI-stripped output."""
         try:
-            # Set a large terminal width to prevent output truncation
-            env = os.environ.copy()
-            env['COLUMNS'] = '200'
-
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
                 timeout=60,  # Increased timeout for commands that may pull Docker images
-                env=env
+                env=self.env
             )
             # Combine stdout and stderr as help can appear in either
             output = result.stdout + result.stderr
 
             # Strip ANSI escape codes (color/formatting codes)
-            # Pattern matches: ESC[ followed by any number of digits/semicolons, ending with a letter
-            ansi_pattern = re.compile(r'\x1b\[[0-9;]*[a-zA-Z]')
-            output = ansi_pattern.sub('', output)
+            output = ANSI_PATTERN.sub(b'', output)
+
+            # Normalize newlines as text mode would
+            output = output.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
 
-            return output
+            return output.decode('utf-8', 'replace')
         except subprocess.TimeoutExpired:
             print(f"Warning: Command {' '.join(cmd)} timed out")
             return None
@@ -72,29 +197,27 @@ class CLIScanner:
         current_section = None
 
         for i, line in enumerate(lines):
+            stripped = line.strip()
+
             # Extract usage
-            if line.strip().startswith('Usage:'):
+            if stripped.startswith('Usage:'):
                 result["usage"] = line.replace('Usage:', '').strip()
 
             # Section headers (check these before description parsing)
-            elif 'Options:' in line:
-                current_section = 'options'
-            elif 'Commands:' in line or 'Arguments:' in line:
-                current_section = 'commands'
+            elif stripped in SECTION_KEYWORDS:
+                current_section = SECTION_KEYWORDS[stripped]
 
             # Extract description (usually after Usage, before Options/Commands)
-            elif line.strip() and not line.startswith(' ') and current_section is None:
+            elif stripped and not line.startswith(' ') and current_section is None:
                 if result["usage"] and not result["description"]:
-                    result["description"] = line.strip()
+                    result["description"] = stripped
 
             # Parse options
-            elif current_section == 'options' and line.strip().startswith('-'):
+            elif current_section == 'options' and stripped.startswith('-'):
                 # Match patterns like: -V, --version, --name <value>
-                option_match = re.match(r'\s+(-[^,\s]+)?(?:,\s+)?(--[^\s]+(?:\s+<[^>]+>)?)\s+(.*)', line)
-                if option_match:
-                    short_flag = option_match.group(1) or ""
-                    long_flag = option_match.group(2)
-                    description = option_match.group(3).strip()
+                option = parse_commander_option(line)
+                if option:
+                    short_flag, long_flag, description = option
 
                     result["options"].append({
                         "short": short_flag,
@@ -103,14 +226,13 @@ class CLIScanner:
                     })
 
             # Parse commands
-            elif current_section == 'commands' and line.strip() and not line.strip().startswith('Additional'):
+            elif current_section == 'commands' and stripped and not stripped.startswith('Additional'):
                 # Match patterns like: command-name [options] <args>  Description
                 # Commander.js pads to a fixed column width, so split on multiple spaces
                 # First strip leading space, then split on 2+ consecutive spaces
-                stripped = line.strip()
-                if stripped and not stripped.startswith('-'):
+                if not stripped.startswith('-'):
                     # Split by multiple spaces (typically 2 or more)
-                    parts = re.split(r'\s{2,}', line.strip(), maxsplit=1)
+                    parts = COLUMN_GAP_PATTERN.split(stripped, maxsplit=1)
                     if len(parts) == 2:
                         cmd_full = parts[0].strip()
                         description = parts[1].strip()
@@ -142,7 +264,7 @@ class CLIScanner:
         for line in lines:
             # Section headers (e.g., "  MISC", "  SANDBOX") - after ANSI stripping
             # Looking for lines that are all caps, indented by 2 spaces, no leading dashes
-            section_match = re.match(r'^\s{2}([A-Z][A-Z\s]+?)\s*$', line)
+            section_match = CUSTOM_SECTION_PATTERN.match(line)
             if section_match and not line.strip().startswith('-'):
                 section_name = section_match.group(1).strip()
                 current_section = {
@@ -155,13 +277,13 @@ class CLIScanner:
             # Option lines (e.g., "    --network <value>")
             if current_section:
                 # Check if this is an option line (starts with dashes after indentation)
-                option_match = re.match(r'^\s+(--.+?)\s{2,}', line)
+                option_match = CUSTOM_OPTION_PATTERN.match(line)
                 if option_match:
                     option_flag = option_match.group(1).strip()
 
                     # Extract default and env var from the line
-                    default_match = re.search(r'\(default:\s*([^)]+)\)', line)
-                    env_match = re.search(r'\(\$([^)]+)\)', line)
+                    default_match = CUSTOM_DEFAULT_PATTERN.search(line)
+                    env_match = CUSTOM_ENV_PATTERN.search(line)
 
                     current_option = {
                         "flag": option_flag,
@@ -173,75 +295,109 @@ class CLIScanner:
 
                 # Description line (indented text after option)
                 elif current_option and line.strip() and not line.strip().startswith('--'):
-                    desc_match = re.match(r'^\s{10,}(.+)', line)
+                    desc_match = CUSTOM_DESCRIPTION_PATTERN.match(line)
                     if desc_match:
                         current_option["description"] = desc_match.group(1).strip()
 
         return result
 
-    def scan_command(self, cmd_path: List[str], depth: int = 0, parent_help: Optional[str] = None) -> Dict[str, Any]:
-        """Recursively scan a command and its subcommands."""
+    def scan_command(self, cmd_path: List[str], depth: int = 0, parent_hash: Optional[bytes] = None) -> Dict[str, Any]:
+        """Scan a command and its subcommands.
+
+        Walks the tree depth-first with an explicit stack rather than recursion,
+        so commands are visited in the same order, but without a Python frame
+        per command. Each subcommand's result is stored in its parent's
+        "subcommands" as it is scanned.
+        """
+        result: Dict[str, Any] = {}
+        # (command path, depth, parent's help hash, parent's subcommands or None for the root)
+        stack = [(cmd_path, depth, parent_hash, None)]
+
+        while stack:
+            cmd_path, depth, parent_hash, siblings = stack.pop()
+            parsed, help_hash, cmd_names = self.scan_single_command(cmd_path, depth, parent_hash)
+
+            if siblings is None:
+                result = parsed
+            else:
+                # Include all subcommands, even ones with errors
+                # Error commands will be rendered with stub sections
+                siblings[cmd_path[-1]] = parsed
+
+            if cmd_names:
+                subcommands = parsed["subcommands"] = {}
+                # Pushed in reverse so they're popped in the order listed
+                for cmd_name in reversed(cmd_names):
+                    stack.append((cmd_path + [cmd_name], depth + 1, help_hash, subcommands))
+
+        return result
+
+    def scan_single_command(self, cmd_path: List[str], depth: int,
+                            parent_hash: Optional[bytes]) -> Tuple[Dict[str, Any], Optional[bytes], List[str]]:
+        """Scan one command without its subcommands.
+
+        Returns the parsed help, the hash of the help output and the names of
+        the subcommands to scan next.
+        """
         cmd_str = ' '.join(cmd_path)
 
         # Avoid infinite loops
         if cmd_str in self.visited:
-            return {"error": "already_visited"}
+            return {"error": "already_visited"}, None, []
 
         self.visited.add(cmd_str)
 
         # Limit depth to prevent runaway recursion
-        if depth > 5:
-            return {"error": "max_depth_exceeded"}
+        if depth > MAX_DEPTH:
+            return {"error": "max_depth_exceeded"}, None, []
 
         print(f"{'  ' * depth}Scanning: {cmd_str}")
 
         # Get help output
         help_output = self.run_command(cmd_path + ['--help'])
         if not help_output:
-            return {"error": "no_help_output"}
+            return {"error": "no_help_output"}, None, []
+
+        help_hash = hashlib.blake2b(help_output.strip().encode(), digest_size=16).digest()
 
         # Check if help output is identical to parent (indicates invalid subcommand)
-        if parent_help and help_output.strip() == parent_help.strip():
+        if help_hash == parent_hash:
             print(f"{'  ' * depth}  ⚠️  Invalid subcommand (returns parent help), skipping")
-            return {"error": "invalid_subcommand"}
+            return {"error": "invalid_subcommand"}, help_hash, []
 
         # Check for errors in help output
-        error_markers = [
-            "ERROR: cli Error in command execution",
-            "TypeError: Do not know how to serialize",
-            "TypeError:",
-            "Error:",
-            "at JSON.stringify",
-        ]
-
-        if any(marker in help_output for marker in error_markers):
+        if ERROR_MARKER_PATTERN.search(help_output):
             print(f"{'  ' * depth}  ⚠️  Command failed with error, skipping")
             return {
                 "error": "command_execution_error",
                 "error_type": "bigint_serialization" if "BigInt" in help_output else "unknown",
                 "error_preview": help_output[:200]
-            }
+            }, help_hash, []
+
+        # Commands that alias the same handler print the same help; parse it once
+        if help_hash in self.help_cache:
+            print(f"{'  ' * depth}  Same help as {self.help_cache[help_hash]}, skipping")
+            return {"error": "duplicate_of", "of": self.help_cache[help_hash]}, help_hash, []
+        self.help_cache[help_hash] = cmd_str
 
         # Determine help format and parse
+        cmd_names = []
         if 'Usage:' in help_output and 'Commands:' in help_output:
             # Commander.js style
             parsed = self.parse_commander_help(help_output)
             parsed["format"] = "commander"
 
-            # Recursively scan subcommands
-            subcommands = {}
-            for cmd in parsed.get("commands", []):
-                cmd_name = cmd["name"]
-                if cmd_name != "help":  # Skip help command
-                    sub_result = self.scan_command(cmd_path + [cmd_name], depth + 1, help_output)
-                    # Include all subcommands, even ones with errors
-                    # Error commands will be rendered with stub sections
-                    subcommands[cmd_name] = sub_result
+            # Skip help command
+            cmd_names = [cmd["name"] for cmd in parsed.get("commands", []) if cmd["name"] != "help"]
 
-            if subcommands:
-                parsed["subcommands"] = subcommands
+            # Start the subcommands' --help in the background so sibling
+            # subprocesses overlap; scanning them then only waits on them
+            if self.executor and depth < MAX_DEPTH:
+                for cmd_name in cmd_names:
+                    if ' '.join(cmd_path + [cmd_name]) not in self.visited:
+                        self.start_command(cmd_path + [cmd_name, '--help'])
 
-        elif re.search(r'^\s{2}[A-Z][A-Z\s]+$', help_output, re.MULTILINE):
+        elif CUSTOM_SECTION_HEADER_PATTERN.search(help_output):
             # Custom format (like 'aztec start') - detected after ANSI stripping
             # Look for section headers like "  MISC", "  SANDBOX", etc.
             parsed = self.parse_custom_help(help_output)
@@ -254,14 +410,22 @@ class CLIScanner:
                 "raw_help": help_output
             }
 
-        return parsed
+        return parsed, help_hash, cmd_names
 
     def scan(self) -> Dict[str, Any]:
-        """Start the recursive scan from the base command."""
+        """Start the scan from the base command."""
+        scanned_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        if self.jobs > 1:
+            with ThreadPoolExecutor(max_workers=self.jobs) as self.executor:
+                data = self.scan_command([self.base_command])
+            self.executor = None
+        else:
+            data = self.scan_command([self.base_command])
+
         return {
             "command": self.base_command,
-            "scanned_at": subprocess.check_output(['date']).decode().strip(),
-            "data": self.scan_command([self.base_command])
+            "scanned_at": scanned_at,
+            "data": data
         }
 
 
@@ -272,6 +436,8 @@ def main():
                         help='Output format (default: json)')
     parser.add_argument('--command', '-c', default='aztec',
                         help='Base command to scan (default: aztec)')
+    parser.add_argument('--jobs', '-j', type=int, default=DEFAULT_JOBS,
+                        help=f'Number of help commands to run concurrently (default: {DEFAULT_JOBS})')
 
     args = parser.parse_args()
 
@@ -284,15 +450,19 @@ def main():
             args.output = args.output.replace('.yaml', '.json').replace('.yml', '.json')
 
     # Scan the CLI
-    scanner = CLIScanner(base_command=args.command)
+    scanner = CLIScanner(base_command=args.command, jobs=args.jobs)
     result = scanner.scan()
 
     # Write output
-    with open(args.output, 'w') as f:
-        if args.format == 'yaml' and YAML_AVAILABLE:
-            yaml.dump(result, f, default_flow_style=False, sort_keys=False)
-        else:
-            json.dump(result, f, indent=2)
+    if args.format == 'json' and ORJSON_AVAILABLE:
+        with open(args.output, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    else:
+        with open(args.output, 'w', buffering=OUTPUT_BUFFER_SIZE) as f:
+            if args.format == 'yaml' and YAML_AVAILABLE:
+                yaml.dump(result, f, Dumper=YAML_DUMPER, default_flow_style=False, sort_keys=False)
+            else:
+                f.writelines(json.JSONEncoder(indent=2).iterencode(result))
 
     print(f"\nDocumentation written to: {args.output}")
 
@@ -7,29 +7,56 @@ Usage:
     python transform_to_markdown.py --input docs.yaml --output cli-reference.md --template custom_template.py
 """
 
+import io
+import os
 import json
+import shutil
 import argparse
-from typing import Dict, Any, List
+import tempfile
+from typing import Dict, Any, List, Optional, TextIO
 from pathlib import Path
 import importlib.util
 
 try:
     import yaml
     YAML_AVAILABLE = True
+    # The libyaml parser is much faster when PyYAML was built with it
+    YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 except ImportError:
     YAML_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# The document is written in many small pieces; buffer them into large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
+
 
 class MarkdownGenerator:
-    """Generates markdown documentation from structured CLI data."""
+    """Generates markdown documentation from structured CLI data.
+
+    The document is written piece by piece to ``out`` as the command tree is
+    walked, rather than joined level by level; without a stream an
+    ``io.StringIO`` is used and ``generate()`` returns its contents.
+    """
 
-    def __init__(self, data: Dict[str, Any], config: Dict[str, Any] = None):
+    def __init__(self, data: Dict[str, Any], config: Dict[str, Any] = None, out: Optional[TextIO] = None):
         self.data = data
         # Merge provided config with defaults
         default_config = self.get_default_config()
         if config:
             default_config.update(config)
         self.config = default_config
+        self.out = out if out is not None else io.StringIO()
+
+        # Settings looked up for every command, read once
+        self.max_depth = self.config.get("max_depth", 5)
+        self.show_usage = self.config.get("show_usage")
+        self.show_env_vars = self.config.get("show_env_vars")
+        self.options_as_table = self.config.get("option_table_format") == "table"
 
     def get_default_config(self) -> Dict[str, Any]:
         """Default configuration for markdown generation."""
@@ -44,57 +71,64 @@ class MarkdownGenerator:
             "option_table_format": "list",  # or "table"
         }
 
-    def generate(self) -> str:
-        """Generate the complete markdown document."""
-        sections = []
+    def generate(self) -> Optional[str]:
+        """Generate the complete markdown document into ``self.out``.
+
+        Returns the document when no output stream was supplied, otherwise None.
+        """
+        w = self.out.write
+        # Top-level sections are separated by a newline
+        separator = ""
 
         # Title
         if self.config.get("title"):
-            sections.append(f"# {self.config['title']}\n")
+            w(f"# {self.config['title']}\n")
+            separator = "\n"
 
         # Metadata
         if self.config.get("include_metadata") and "scanned_at" in self.data:
-            sections.append(f"*Generated: {self.data['scanned_at']}*\n")
-            sections.append(f"*Command: `{self.data['command']}`*\n")
+            w(f"{separator}*Generated: {self.data['scanned_at']}*\n")
+            w(f"\n*Command: `{self.data['command']}`*\n")
+            separator = "\n"
 
-        # Table of Contents
-        if self.config.get("include_toc"):
-            toc = self.generate_toc(self.data.get("data", {}), self.data.get("command", ""))
-            if toc:
-                sections.append("## Table of Contents\n")
-                sections.append(toc)
+        # Table of Contents (empty only if max_depth excludes even the root)
+        if self.config.get("include_toc") and self.max_depth >= 0:
+            w(f"{separator}## Table of Contents\n\n")
+            self.generate_toc(self.data.get("data", {}), self.data.get("command", ""))
+            separator = "\n"
 
         # Main content
-        sections.append(self.generate_command_docs(
+        w(separator)
+        self.generate_command_docs(
             self.data.get("command", ""),
             self.data.get("data", {}),
             depth=1
-        ))
+        )
 
-        return "\n".join(sections)
+        if isinstance(self.out, io.StringIO):
+            return self.out.getvalue()
+        return None
 
-    def generate_toc(self, cmd_data: Dict[str, Any], cmd_name: str, depth: int = 0) -> str:
-        """Generate table of contents."""
-        if depth > self.config.get("max_depth", 5):
-            return ""
+    def generate_toc(self, cmd_data: Dict[str, Any], cmd_name: str, depth: int = 0):
+        """Write the table of contents entries for a command and its subcommands."""
+        max_depth = self.max_depth
+        if depth > max_depth:
+            return
 
-        lines = []
+        w = self.out.write
         indent = "  " * depth
 
         # Add current command (even if it has errors - it will have a stub section)
         slug = self.slugify(cmd_name)
-        lines.append(f"{indent}- [{cmd_name}](#{slug})")
+        w(f"{indent}- [{cmd_name}](#{slug})")
 
-        # Add subcommands
-        if cmd_data.get("format") == "commander" and "subcommands" in cmd_data:
+        # Add subcommands (none of which are listed past max_depth)
+        if cmd_data.get("format") == "commander" and "subcommands" in cmd_data and depth < max_depth:
             for sub_name, sub_data in cmd_data["subcommands"].items():
                 # Include all commands in TOC, even ones with errors
                 full_name = f"{cmd_name} {sub_name}"
-                sub_toc = self.generate_toc(sub_data, full_name, depth + 1)
-                if sub_toc:
-                    lines.append(sub_toc)
-
-        return "\n".join(lines)
+                w("\n")
+                self.generate_toc(sub_data, full_name, depth + 1)
 
     def slugify(self, text: str) -> str:
         """Convert text to a markdown-friendly anchor."""
@@ -105,50 +139,52 @@ class MarkdownGenerator:
         # Replace < and > with their HTML entities to prevent MDX from treating them as tags
         return text.replace('<', '&lt;').replace('>', '&gt;')
 
-    def generate_command_docs(self, cmd_name: str, cmd_data: Dict[str, Any], depth: int = 1) -> str:
-        """Generate documentation for a single command."""
-        if depth > self.config.get("max_depth", 5):
-            return ""
+    def generate_command_docs(self, cmd_name: str, cmd_data: Dict[str, Any], depth: int = 1):
+        """Write the documentation for a command and its subcommands."""
+        if depth > self.max_depth:
+            return
+
+        w = self.out.write
+        heading = "#" * (depth + 1)
 
         # Handle commands with errors - still create section with note
         if "error" in cmd_data:
-            heading = "#" * (depth + 1)
             error_type = cmd_data.get("error_type", "unknown")
 
-            if error_type == "bigint_serialization":
-                return f"{heading} {cmd_name}\n\n*Help for this command is currently unavailable due to a technical issue with option serialization.*\n\n"
+            if cmd_data["error"] == "duplicate_of":
+                w(f"{heading} {cmd_name}\n\n*This command has the same help as `{cmd_data.get('of', '')}`.*\n\n")
+            elif error_type == "bigint_serialization":
+                w(f"{heading} {cmd_name}\n\n*Help for this command is currently unavailable due to a technical issue with option serialization.*\n\n")
             else:
-                return f"{heading} {cmd_name}\n\n*This command help is currently unavailable due to a technical issue.*\n\n"
-
-        sections = []
-        heading = "#" * (depth + 1)
+                w(f"{heading} {cmd_name}\n\n*This command help is currently unavailable due to a technical issue.*\n\n")
+            return
 
         # Command header
-        sections.append(f"{heading} {cmd_name}\n")
+        w(f"{heading} {cmd_name}\n")
 
-        # Format-specific rendering
-        if cmd_data.get("format") == "commander":
-            sections.append(self.render_commander_command(cmd_data, depth))
+        # Format-specific rendering; each part is separated by a newline
+        cmd_format = cmd_data.get("format")
+        if cmd_format == "commander":
+            w("\n")
+            self.render_commander_command(cmd_data, depth)
 
             # Recursively render subcommands
             if "subcommands" in cmd_data:
-                sections.append(f"\n{heading}# Subcommands\n")
+                w(f"\n\n{heading}# Subcommands\n")
                 for sub_name, sub_data in cmd_data["subcommands"].items():
                     full_name = f"{cmd_name} {sub_name}"
-                    sections.append(self.generate_command_docs(full_name, sub_data, depth + 1))
+                    w("\n")
+                    self.generate_command_docs(full_name, sub_data, depth + 1)
 
-        elif cmd_data.get("format") == "custom":
-            sections.append(self.render_custom_command(cmd_data, depth))
+        elif cmd_format == "custom":
+            w("\n")
+            self.render_custom_command(cmd_data, depth)
 
-        elif cmd_data.get("format") == "raw":
-            sections.append("```")
-            sections.append(cmd_data.get("raw_help", ""))
-            sections.append("```\n")
+        elif cmd_format == "raw":
+            w(f"\n```\n{cmd_data.get('raw_help', '')}\n```\n")
 
-        return "\n".join(sections)
-
-    def render_commander_command(self, cmd_data: Dict[str, Any], depth: int) -> str:
-        """Render a Commander.js style command."""
+    def render_commander_command(self, cmd_data: Dict[str, Any], depth: int):
+        """Write a Commander.js style command."""
         sections = []
 
         # Description
@@ -156,7 +192,7 @@ class MarkdownGenerator:
             sections.append(self.escape_html_entities(cmd_data["description"]) + "\n")
 
         # Usage
-        if self.config.get("show_usage") and cmd_data.get("usage"):
+        if self.show_usage and cmd_data.get("usage"):
             sections.append("**Usage:**")
             sections.append(f"```bash")
             sections.append(cmd_data["usage"])
@@ -172,16 +208,16 @@ class MarkdownGenerator:
         # Options
         if cmd_data.get("options"):
             sections.append("**Options:**\n")
-            if self.config.get("option_table_format") == "table":
+            if self.options_as_table:
                 sections.append(self.render_options_table(cmd_data["options"]))
             else:
                 sections.append(self.render_options_list(cmd_data["options"]))
             sections.append("")
 
-        return "\n".join(sections)
+        self.out.write("\n".join(sections))
 
-    def render_custom_command(self, cmd_data: Dict[str, Any], depth: int) -> str:
-        """Render a custom formatted command (like 'aztec start')."""
+    def render_custom_command(self, cmd_data: Dict[str, Any], depth: int):
+        """Write a custom formatted command (like 'aztec start')."""
         sections = []
 
         if cmd_data.get("description"):
@@ -206,12 +242,12 @@ class MarkdownGenerator:
                         sections.append(f"  {self.escape_html_entities(opt['description'])}")
 
                     # Environment variable
-                    if self.config.get("show_env_vars") and opt.get("env"):
+                    if self.show_env_vars and opt.get("env"):
                         sections.append(f"  *Environment: `${opt['env']}`*")
 
                     sections.append("")
 
-        return "\n".join(sections)
+        self.out.write("\n".join(sections))
 
     def render_options_table(self, options: List[Dict[str, Any]]) -> str:
         """Render options as a markdown table."""
@@ -240,6 +276,16 @@ class MarkdownGenerator:
         return "\n".join(lines)
 
 
+def copy_output_mode(output_path: str, tmp_path: str) -> None:
+    """Give a temporary file, which is only readable by us, the permissions writing the output directly would have."""
+    if os.path.exists(output_path):
+        shutil.copymode(output_path, tmp_path)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+
 def load_config_from_file(config_path: str) -> Dict[str, Any]:
     """Load configuration from a Python file."""
     spec = importlib.util.spec_from_file_location("config", config_path)
@@ -263,13 +309,15 @@ def main():
 
     args = parser.parse_args()
 
-    # Load input data
-    with open(args.input, 'r') as f:
+    # Load input data (as bytes, both parsers decode it themselves)
+    with open(args.input, 'rb') as f:
         if args.input.endswith('.yaml') or args.input.endswith('.yml'):
             if not YAML_AVAILABLE:
                 print("Error: YAML input requires PyYAML. Install it with: pip install pyyaml")
                 return
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YAML_LOADER)
+        elif ORJSON_AVAILABLE:
+            data = orjson.loads(f.read())
         else:
             data = json.load(f)
 
@@ -284,13 +332,20 @@ def main():
             config = {}
         config['title'] = args.title
 
-    # Generate markdown - let MarkdownGenerator merge with defaults
-    generator = MarkdownGenerator(data, config)
-    markdown = generator.generate()
-
-    # Write output
-    with open(args.output, 'w') as f:
-        f.write(markdown)
+    # Generate markdown straight into a temporary file next to the output, which
+    # then replaces it, so a failed run doesn't leave a truncated reference
+    tmp = tempfile.NamedTemporaryFile('w', buffering=OUTPUT_BUFFER_SIZE, delete=False,
+                                      dir=os.path.dirname(os.path.abspath(args.output)))
+    try:
+        with tmp:
+            # Let MarkdownGenerator merge with defaults
+            MarkdownGenerator(data, config, out=tmp).generate()
+
+        copy_output_mode(args.output, tmp.name)
+        os.replace(tmp.name, args.output)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
 
     print(f"Markdown documentation written to: {args.output}")
 
@@ -11,6 +11,39 @@ import re
 import subprocess
 import sys
 import json
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Issue links, e.g. https://github.com/owner/repo/issues/123
+ISSUE_URL_PATTERN = re.compile(r'https?://github\.com/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)/issues/(\d+)')
+CLOSING_KEYWORD_PATTERN = re.compile(r'\b(close[sd]?|fix(?:e[sd])?|resolve[sd]?)\b', re.IGNORECASE)
+# owner/repo#123
+CROSS_REPO_REF_PATTERN = re.compile(r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+)#(\d+)')
+# #123, for both issues and PRs
+NUMBER_REF_PATTERN = re.compile(r'#(\d+)')
+# Largest GraphQL Int; no issue or PR number is above it
+MAX_GRAPHQL_INT = 2**31 - 1
+
+# Issue states looked up so far, {(target_repo, issue_num): 'open', 'closed' or
+# None if not found}. Shared by all commits so an issue referenced from several
+# PRs is only looked up once; an issue is set to 'closed' before closing it, so
+# it's only closed (and commented on) once
+issue_states = {}
+issue_states_lock = threading.Lock()
+
+# With a token, the API is called directly over kept-alive connections rather
+# than starting a gh process (and TLS handshake) per call; gh is the fallback
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', f'{GITHUB_API_URL}/graphql')
+
+# Requests that are safe to send again if a call fails partway
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+# http.client connections aren't thread-safe, so each worker thread keeps its own
+connections = threading.local()
 
 
 def run(cmd):
@@ -22,15 +55,141 @@ def run(cmd):
         return ""
 
 
-def gh_api(endpoint):
-    """Call GitHub API and return JSON, or None on error."""
+def github_request(method, url, payload=None):
+    """Call the GitHub API; returns (status, JSON body), or (None, None) on error.
+
+    Connections are kept alive per thread and host. A request is only retried
+    (once, on a fresh connection) if it may not have reached GitHub, i.e. a
+    reused connection had gone stale, or if repeating it is harmless; so e.g.
+    a comment is never posted twice.
+    """
+    parts = urlsplit(url)
+    pool = getattr(connections, 'pool', None)
+    if pool is None:
+        pool = connections.pool = {}
+    headers = {
+        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "aztec-auto-close-issues",
+    }
+    body = None
+    if payload is not None:
+        body = json.dumps(payload).encode()
+        headers["Content-Type"] = "application/json"
+
+    for attempt in range(2):
+        connection = pool.get(parts.netloc)
+        reused = connection is not None
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            connection = pool[parts.netloc] = connection_class(parts.netloc, timeout=60)
+        try:
+            connection.request(method, parts.path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            connection.close()
+            del pool[parts.netloc]
+            # The server closing an idle kept-alive connection shows up as
+            # these before any response; anything else (e.g. a timeout) may
+            # come after GitHub already acted on the request
+            stale = reused and isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError))
+            if stale or method in IDEMPOTENT_METHODS:
+                continue
+            return None, None
+        try:
+            return response.status, json.loads(data) if data else None
+        except json.JSONDecodeError:
+            return response.status, None
+    return None, None
+
+
+def gh_graphql(query):
+    """Run a GitHub GraphQL query and return its data, or None on error.
+
+    Lookups that fail on their own (e.g. a missing PR) come back as null
+    fields next to the others, alongside an errors list (and, for gh, a
+    non-zero exit); the data is still returned rather than discarded.
+    """
+    if GITHUB_TOKEN:
+        _, response = github_request("POST", GITHUB_GRAPHQL_URL, {"query": query})
+        return response.get('data') if isinstance(response, dict) else None
+
+    result = subprocess.run(["gh", "api", "graphql", "-f", f"query={query}"], capture_output=True, text=True)
     try:
-        output = run(["gh", "api", endpoint])
-        return json.loads(output) if output else None
-    except json.JSONDecodeError:
+        return json.loads(result.stdout).get('data')
+    except (json.JSONDecodeError, AttributeError):
         return None
 
 
+def gh_close_issue(target_repo, issue_num, comment):
+    """Comment on and close an issue; returns whether it worked."""
+    if GITHUB_TOKEN:
+        issue_url = f"{GITHUB_API_URL}/repos/{target_repo}/issues/{issue_num}"
+        status, _ = github_request("POST", f"{issue_url}/comments", {"body": comment})
+        if status != 201:
+            return False
+        status, _ = github_request("PATCH", issue_url, {"state": "closed"})
+        return status == 200
+
+    result = run(["gh", "issue", "close", issue_num, "--repo", target_repo, "--comment", comment])
+    return result or result == ""  # gh issue close may return empty on success
+
+
+def fetch_pull_requests(repo, pr_numbers):
+    """Look up several PRs in one query; returns {pr_number: data or None}."""
+    # Larger numbers aren't valid GraphQL Ints and would fail the whole query
+    numbers = [n for n in dict.fromkeys(pr_numbers) if int(n) <= MAX_GRAPHQL_INT]
+    if not numbers:
+        return {}
+
+    owner, name = repo.split('/', 1)
+    fields = " ".join(f"pr{i}: pullRequest(number: {int(n)}) {{ title body merged }}" for i, n in enumerate(numbers))
+    data = gh_graphql(f'{{ repository(owner: "{owner}", name: "{name}") {{ {fields} }} }}')
+    repository = (data or {}).get('repository') or {}
+    return {n: repository.get(f"pr{i}") for i, n in enumerate(numbers)}
+
+
+def fetch_issue_states(issues):
+    """Look up the state of several (target_repo, issue_num) in one query.
+
+    Only issues not already in issue_states are looked up, and the results
+    are added to it. If the query fails nothing is added, so a later commit
+    referencing the same issues looks them up again.
+    """
+    with issue_states_lock:
+        missing = [issue for issue in dict.fromkeys(issues) if issue not in issue_states]
+
+    by_repo = {}
+    for target_repo, issue_num in missing:
+        if int(issue_num) <= MAX_GRAPHQL_INT:
+            by_repo.setdefault(target_repo, []).append(issue_num)
+    if not by_repo:
+        return
+
+    # Issue numbers may also be PRs, which close by being merged
+    fields = []
+    for j, (target_repo, numbers) in enumerate(by_repo.items()):
+        owner, name = target_repo.split('/', 1)
+        lookups = " ".join(f"i{k}: issueOrPullRequest(number: {int(n)}) {{ ... on Issue {{ state }} ... on PullRequest {{ state }} }}"
+                           for k, n in enumerate(numbers))
+        fields.append(f'r{j}: repository(owner: "{owner}", name: "{name}") {{ {lookups} }}')
+    data = gh_graphql(f"{{ {' '.join(fields)} }}")
+    if data is None:
+        return
+
+    with issue_states_lock:
+        for j, (target_repo, numbers) in enumerate(by_repo.items()):
+            repository = data.get(f"r{j}") or {}
+            for k, issue_num in enumerate(numbers):
+                issue = repository.get(f"i{k}")
+                state = None
+                if issue and issue.get('state'):
+                    state = 'open' if issue['state'] == 'OPEN' else 'closed'
+                # Another commit may have looked it up, or closed it, meanwhile
+                issue_states.setdefault((target_repo, issue_num), state)
+
+
 def parse_issue_ref(repo, issue_ref):
     """Parse issue reference into (target_repo, issue_num)."""
     if '#' in issue_ref and '/' in issue_ref:
@@ -45,39 +204,43 @@ def parse_issue_ref(repo, issue_ref):
 def extract_issue_refs(text):
     """Extract issue references from text like 'Closes #123' or 'Fixes owner/repo#456'."""
     issues = []
-    cross_repo_refs = []
+    cross_repo_refs = set()
 
     # First, extract all URL-based references (these work with or without keywords)
-    for owner, repo, num in re.findall(r'https?://github\.com/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)/issues/(\d+)', text):
-        cross_repo_refs.append(num)
+    for owner, repo, num in ISSUE_URL_PATTERN.findall(text):
+        cross_repo_refs.add(num)
         issues.append(f"{owner}/{repo}#{num}")
 
-    # Then extract keyword-based references
+    # Then extract keyword-based references; only lines with a '#' can have
+    # any, so the keyword search is skipped for the rest
     for line in text.split('\n'):
-        if re.search(r'\b(close[sd]?|fix(?:e[sd])?|resolve[sd]?)\b', line, re.IGNORECASE):
+        if '#' in line and CLOSING_KEYWORD_PATTERN.search(line):
             # Cross-repo: owner/repo#123
-            for owner_repo, num in re.findall(r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+)#(\d+)', line):
-                cross_repo_refs.append(num)
+            for owner_repo, num in CROSS_REPO_REF_PATTERN.findall(line):
+                cross_repo_refs.add(num)
                 issues.append(f"{owner_repo}#{num}")
 
             # Same-repo: #123 (skip if already captured as cross-repo or URL)
-            for num in re.findall(r'#(\d+)', line):
+            for num in NUMBER_REF_PATTERN.findall(line):
                 if num not in cross_repo_refs:
                     issues.append(num)
 
-    return list(set(issues))
+    # Deduplicated, in the order they appear
+    return list(dict.fromkeys(issues))
 
 
 def close_issue(repo, issue_ref, pr_number, pr_title, dry_run=False):
-    """Close issue if it's open."""
+    """Close issue if it's open, going by the state from fetch_issue_states."""
     target_repo, issue_num = parse_issue_ref(repo, issue_ref)
 
-    # Check if issue is open
-    issue_data = gh_api(f"repos/{target_repo}/issues/{issue_num}")
-    if not issue_data:
+    # Check if issue is open, claiming it if so
+    with issue_states_lock:
+        state = issue_states.get((target_repo, issue_num))
+        if state == 'open' and not dry_run:
+            issue_states[(target_repo, issue_num)] = 'closed'
+    if not state:
         return False
 
-    state = issue_data.get('state')
     if state == 'closed':
         print(f"Already closed: {target_repo}#{issue_num} (from PR #{pr_number}: {pr_title})")
         return False
@@ -97,32 +260,43 @@ def close_issue(repo, issue_ref, pr_number, pr_title, dry_run=False):
 
     comment = f"This issue was automatically closed because it was referenced in {'PR' if target_repo == repo else f'{repo} PR'} #{pr_number} which has been merged to the default branch.{run_url}"
 
-    result = run(["gh", "issue", "close", issue_num, "--repo", target_repo, "--comment", comment])
-    if result or result == "":  # gh issue close may return empty on success
+    if gh_close_issue(target_repo, issue_num, comment):
         print(f"Closed {target_repo}#{issue_num} (from PR #{pr_number}: {pr_title})")
         return True
 
+    # Still open, so a later reference can try again
+    with issue_states_lock:
+        issue_states[(target_repo, issue_num)] = 'open'
     print(f"Warning: Failed to close {target_repo}#{issue_num}", file=sys.stderr)
     return False
 
 
-def process_commit(commit_sha, repo, dry_run=False):
+def process_commit(commit_sha, message, repo, dry_run=False):
     """Process a commit and close any referenced issues."""
     # Get all PR numbers from commit message
-    message = run(["git", "log", "-1", "--pretty=%B", commit_sha])
-    pr_numbers = re.findall(r'#(\d+)', message)
+    pr_numbers = NUMBER_REF_PATTERN.findall(message)
+    if not pr_numbers:
+        return
+
+    # Get PR data, all PRs in one request
+    pull_requests = fetch_pull_requests(repo, pr_numbers)
 
+    merged_prs = []
     for pr_number in pr_numbers:
-        # Get PR data
-        pr_data = gh_api(f"repos/{repo}/pulls/{pr_number}")
+        pr_data = pull_requests.get(pr_number)
         if not pr_data or not pr_data.get('merged'):
             continue
 
         # Find issue references in PR
         text = f"{pr_data.get('title', '')}\n{pr_data.get('body', '') or ''}"
-        issue_refs = extract_issue_refs(text)
+        merged_prs.append((pr_number, pr_data, extract_issue_refs(text)))
 
-        # Close each issue
+    # Check the state of every referenced issue in one request
+    fetch_issue_states(
+        [parse_issue_ref(repo, issue_ref) for _, _, issue_refs in merged_prs for issue_ref in issue_refs])
+
+    # Close each issue
+    for pr_number, pr_data, issue_refs in merged_prs:
         for issue_ref in issue_refs:
             close_issue(repo, issue_ref, pr_number, pr_data['title'], dry_run)
 
@@ -140,15 +314,24 @@ def main():
     if len(sys.argv) == 3:
         before, after = sys.argv[1], sys.argv[2]
         if before == '0000000000000000000000000000000000000000':
-            commits = [after]
+            revisions = ["-1", after]
         else:
-            commits = [c for c in run(["git", "rev-list", f"{before}..{after}"]).split('\n') if c]
+            revisions = [f"{before}..{after}"]
     else:
-        commits = [sys.argv[1]]
-
-    # Process each commit
-    for commit in commits:
-        process_commit(commit, repo, dry_run)
+        revisions = ["-1", sys.argv[1]]
+
+    # Get every commit's message with one git call; each record is the SHA and
+    # message separated by \x1f, and ends with \x1e
+    commits = []
+    for record in run(["git", "log", "--format=%H%x1f%B%x1e"] + revisions).split('\x1e'):
+        commit_sha, sep, message = record.lstrip('\n').partition('\x1f')
+        if sep:
+            commits.append((commit_sha, message))
+
+    # Process commits concurrently, the time is spent waiting on gh
+    workers = int(os.environ.get('GH_CONCURRENCY', '16'))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda commit: process_commit(*commit, repo, dry_run), commits))
 
 
 if __name__ == '__main__':
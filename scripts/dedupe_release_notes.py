@@ -25,9 +25,20 @@ Example of type 4 (merge-train duplicates - same description, no PR):
   * use assert_ssa_does_not_change throughout tests ([b471339](...))  <- removed
 """
 
+import os
 import re
+import shutil
 import sys
-from collections import defaultdict
+import tempfile
+
+# An entry's bullet, its description and the trailing links, e.g.
+# "* Fix bug ([#16667](...)) ([a2e7a4d](...))"
+ENTRY_PATTERN = re.compile(r'^(\s*\*\s*)(.+?)(\s*\([^\)]+\).*)?$')
+PR_LINK_PATTERN = re.compile(r'\[#(\d+)\]')
+# Commit hashes (7+ hex chars)
+COMMIT_LINK_PATTERN = re.compile(r'\[[0-9a-f]{7,}\]', re.IGNORECASE)
+# Output lines are written one at a time; buffer them into large writes
+OUTPUT_BUFFER_SIZE = 1 << 20
 
 
 def parse_entry(line):
@@ -39,7 +50,7 @@ def parse_entry(line):
     - has_commit: whether it contains a commit hash
     """
     # Match the description (everything before the first link)
-    desc_match = re.match(r'^(\s*\*\s*)(.+?)(\s*\([^\)]+\).*)?$', line)
+    desc_match = ENTRY_PATTERN.match(line)
     if not desc_match:
         return None
 
@@ -48,14 +59,14 @@ def parse_entry(line):
     links_part = desc_match.group(3) or ""
 
     # Extract PR number if present
-    pr_match = re.search(r'\[#(\d+)\]', links_part)
+    pr_match = PR_LINK_PATTERN.search(links_part)
     pr_number = pr_match.group(1) if pr_match else None
 
     # Check if it has a PR reference (#XXXXX)
     has_pr = bool(pr_match)
 
     # Check if it has a commit hash (7+ hex chars)
-    has_commit = bool(re.search(r'\[[0-9a-f]{7,}\]', links_part, re.IGNORECASE))
+    has_commit = bool(COMMIT_LINK_PATTERN.search(links_part))
 
     return {
         'indent': indent,
@@ -68,6 +79,18 @@ def parse_entry(line):
     }
 
 
+def copy_output_mode(output_file, tmp_path):
+    """
+    Give a temporary file, which is only readable by us, the permissions writing output_file directly would have.
+    """
+    if os.path.exists(output_file):
+        shutil.copymode(output_file, tmp_path)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+
 def deduplicate_release_notes(input_file, output_file=None):
     """
     Remove exact duplicates and commit-only entries when there's a PR entry with the same description.
@@ -75,101 +98,72 @@ def deduplicate_release_notes(input_file, output_file=None):
     if output_file is None:
         output_file = input_file
 
-    with open(input_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    original_count = len(lines)
-
-    # Step 1: Remove exact duplicates
-    seen_lines = {}
+    # First pass: remove exact duplicates, parsing each remaining line once, and
+    # note which descriptions have an entry with a PR, which decides step 2 for
+    # entries earlier in the file
+    original_count = 0
+    seen_lines = set()
     exact_dupes_removed = 0
-    deduplicated_lines = []
-
-    for i, line in enumerate(lines):
-        if line not in seen_lines:
-            seen_lines[line] = i
-            deduplicated_lines.append(line)
-        else:
-            exact_dupes_removed += 1
-
-    # Step 2: Remove entries without PR when a PR entry exists
-    entries_by_desc = defaultdict(list)
-
-    for i, line in enumerate(deduplicated_lines):
-        parsed = parse_entry(line)
-        if parsed and parsed['description']:
-            entries_by_desc[parsed['description']].append((i, parsed))
+    deduplicated_entries = []
+    descriptions_with_pr = set()
 
-    lines_to_remove = set()
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            original_count += 1
+            if line in seen_lines:
+                exact_dupes_removed += 1
+                continue
+            seen_lines.add(line)
+
+            parsed = parse_entry(line)
+            deduplicated_entries.append((line, parsed))
+            if parsed and parsed['has_pr']:
+                descriptions_with_pr.add(parsed['description'])
+
+    # Second pass: apply steps 2-4 to the parsed entries, keeping the first
+    # entry of each key, and write the kept lines to a temporary file that then
+    # replaces the output, so the notes are never left half written (they're
+    # usually rewritten in place)
+    seen_desc_pr = set()
+    seen_desc_commit = set()
     no_pr_dupes_removed = 0
-
-    for description, entries in entries_by_desc.items():
-        if len(entries) <= 1:
-            continue
-
-        # Check if there's at least one entry with a PR
-        has_pr_entries = [e for e in entries if e[1]['has_pr']]
-        no_pr_entries = [e for e in entries if not e[1]['has_pr']]
-
-        if has_pr_entries and no_pr_entries:
-            # Remove entries without PR (whether they have commit or not)
-            for idx, parsed in no_pr_entries:
-                lines_to_remove.add(idx)
-                no_pr_dupes_removed += 1
-
-    # Step 3: Remove entries with same description + PR number (keep first occurrence)
-    entries_by_desc_pr = defaultdict(list)
-
-    for i, line in enumerate(deduplicated_lines):
-        if i in lines_to_remove:
-            continue
-        parsed = parse_entry(line)
-        if parsed and parsed['description'] and parsed['pr_number']:
-            key = (parsed['description'], parsed['pr_number'])
-            entries_by_desc_pr[key].append((i, parsed))
-
     pr_dupes_removed = 0
-
-    for key, entries in entries_by_desc_pr.items():
-        if len(entries) <= 1:
-            continue
-
-        # Keep the first entry, remove the rest
-        for idx, parsed in entries[1:]:
-            lines_to_remove.add(idx)
-            pr_dupes_removed += 1
-
-    # Step 4: Remove entries with same description but no PR (keep first occurrence)
-    # This handles merge-train duplicates where commits get added multiple times
-    entries_by_desc_no_pr = defaultdict(list)
-
-    for i, line in enumerate(deduplicated_lines):
-        if i in lines_to_remove:
-            continue
-        parsed = parse_entry(line)
-        if parsed and parsed['description'] and not parsed['pr_number'] and parsed['has_commit']:
-            entries_by_desc_no_pr[parsed['description']].append((i, parsed))
-
     commit_only_desc_dupes_removed = 0
-
-    for description, entries in entries_by_desc_no_pr.items():
-        if len(entries) <= 1:
-            continue
-
-        # Keep the first entry (earliest commit to land), remove the rest
-        for idx, parsed in entries[1:]:
-            lines_to_remove.add(idx)
-            commit_only_desc_dupes_removed += 1
-
-    # Build final output
-    output_lines = []
-    for i, line in enumerate(deduplicated_lines):
-        if i not in lines_to_remove:
-            output_lines.append(line)
-
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.writelines(output_lines)
+    final_count = 0
+
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE, delete=False,
+                                      dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        with tmp:
+            for line, parsed in deduplicated_entries:
+                if parsed and parsed['description']:
+                    description = parsed['description']
+                    if parsed['pr_number']:
+                        # Step 3: Remove entries with same description + PR number
+                        key = (description, parsed['pr_number'])
+                        if key in seen_desc_pr:
+                            pr_dupes_removed += 1
+                            continue
+                        seen_desc_pr.add(key)
+                    elif description in descriptions_with_pr:
+                        # Step 2: Remove entries without PR when a PR entry exists
+                        no_pr_dupes_removed += 1
+                        continue
+                    elif parsed['has_commit']:
+                        # Step 4: Remove entries with same description but no PR
+                        # This handles merge-train duplicates where commits get added multiple times
+                        if description in seen_desc_commit:
+                            commit_only_desc_dupes_removed += 1
+                            continue
+                        seen_desc_commit.add(description)
+                tmp.write(line)
+                final_count += 1
+
+        copy_output_mode(output_file, tmp.name)
+        os.replace(tmp.name, output_file)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
 
     return {
         'exact_duplicates': exact_dupes_removed,
@@ -178,7 +172,7 @@ def deduplicate_release_notes(input_file, output_file=None):
         'commit_only_desc_duplicates': commit_only_desc_dupes_removed,
         'total_removed': exact_dupes_removed + no_pr_dupes_removed + pr_dupes_removed + commit_only_desc_dupes_removed,
         'original_lines': original_count,
-        'final_lines': len(output_lines)
+        'final_lines': final_count
     }
 
 
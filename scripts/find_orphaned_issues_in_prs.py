@@ -6,13 +6,36 @@ using keywords like "Closes #123", then checks which of those issues are
 still open and would benefit from being closed.
 """
 
+import os
 import subprocess
 import sys
 import re
 import json
+import time
+from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 
+# Issue links, e.g. https://github.com/owner/repo/issues/123
+ISSUE_URL_PATTERN = re.compile(r'https?://github\.com/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)/issues/(\d+)')
+CLOSING_KEYWORD_PATTERN = re.compile(r'\b(?:close[sd]?|fix(?:e[sd])?|resolve[sd]?)\b', re.IGNORECASE)
+# owner/repo#123
+CROSS_REPO_REF_PATTERN = re.compile(r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+)#(\d+)')
+# #123, for both issues and PRs
+NUMBER_REF_PATTERN = re.compile(r'#(\d+)')
+
+# PRs and issues looked up per GraphQL query
+PR_BATCH_SIZE = 50
+ISSUE_BATCH_SIZE = 100
+# Largest GraphQL Int; no issue or PR number is above it
+MAX_GRAPHQL_INT = 2**31 - 1
+# Times a rate-limited gh call is retried, waiting twice as long each time
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_WAIT = 15
+# Merged PRs and closed issues are saved here, so reruns don't fetch them again
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'orphaned_issues'
+
 def run_command(cmd):
     """Run a command and return its output."""
     try:
@@ -21,29 +44,134 @@ def run_command(cmd):
     except subprocess.CalledProcessError:
         return ""
 
-def run_gh_api(endpoint):
-    """Run gh api command."""
+def stream_command(cmd):
+    """Run a command and yield its output lines as they're produced."""
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) as proc:
+        for line in proc.stdout:
+            yield line.rstrip('\n')
+
+def run_gh(args):
+    """Run gh, retrying with backoff while GitHub reports a rate limit."""
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        result = subprocess.run(["gh"] + args, capture_output=True, text=True)
+        if result.returncode == 0 or 'rate limit' not in result.stderr.lower() or attempt == RATE_LIMIT_RETRIES:
+            return result
+        time.sleep(RATE_LIMIT_WAIT * 2 ** attempt)
+
+def run_gh_graphql(query):
+    """Run a gh api graphql query and return its data, or None on error.
+
+    Lookups that fail on their own (e.g. a missing PR) come back as null
+    fields next to the others; gh exits non-zero for those but still prints
+    the response, so partial data is returned rather than discarded.
+    """
+    result = run_gh(["api", "graphql", "-f", f"query={query}"])
     try:
-        result = subprocess.run(
-            ["gh", "api", endpoint],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return json.loads(result.stdout)
-    except (subprocess.CalledProcessError, json.JSONDecodeError):
+        return json.loads(result.stdout).get('data')
+    except (json.JSONDecodeError, AttributeError):
         return None
 
-def get_merge_train_commits(branch="next", since="10 years ago"):
-    """Get all merge-train commits."""
-    cmd = ["git", "log", "--merges", f"--since={since}", "--pretty=format:%H|%s", branch]
-    output = run_command(cmd)
+def read_cache(cache_dir, repo, key):
+    """Return the cached response for key, or None if there isn't one."""
+    if cache_dir is None:
+        return None
+    try:
+        return json.loads((cache_dir / repo / f"{key}.json").read_text())
+    except (OSError, ValueError):
+        return None
 
-    if not output:
-        return []
+def write_cache(cache_dir, repo, key, data):
+    """Save a response; failing to is not an error, it's just fetched again next time."""
+    if cache_dir is None:
+        return
+    try:
+        (cache_dir / repo).mkdir(parents=True, exist_ok=True)
+        (cache_dir / repo / f"{key}.json").write_text(json.dumps(data))
+    except OSError:
+        pass
+
+def fetch_pull_requests(repo, pr_numbers, cache_dir=None):
+    """Look up the title and body of several PRs in one query; returns {pr_number: data or None}.
+
+    The PRs are merged and so don't change; ones found in cache_dir aren't queried.
+    """
+    pull_requests = {}
+    numbers = []
+    for n in pr_numbers:
+        pr_data = read_cache(cache_dir, repo, f"pr_{n}")
+        if pr_data is not None:
+            pull_requests[n] = pr_data
+        elif n <= MAX_GRAPHQL_INT:
+            # Larger numbers aren't valid GraphQL Ints and would fail the whole query
+            numbers.append(n)
+    if not numbers:
+        return pull_requests
+
+    owner, name = repo.split('/', 1)
+    fields = " ".join(f"pr{i}: pullRequest(number: {n}) {{ title body }}" for i, n in enumerate(numbers))
+    data = run_gh_graphql(f'{{ repository(owner: "{owner}", name: "{name}") {{ {fields} }} }}')
+    repository = (data or {}).get('repository') or {}
+    for i, n in enumerate(numbers):
+        pr_data = pull_requests[n] = repository.get(f"pr{i}")
+        if pr_data:
+            write_cache(cache_dir, repo, f"pr_{n}", pr_data)
+    return pull_requests
+
+def fetch_issues(issues, cache_dir=None):
+    """Look up the state and title of several (target_repo, issue_num) in one query.
+
+    Returns {(target_repo, issue_num): {'state': 'open' or 'closed', 'title': ...} or None}.
+    Closed issues are cached, open ones are fetched every time.
+    """
+    results = {}
+    by_repo = {}
+    for target_repo, issue_num in issues:
+        issue_data = read_cache(cache_dir, target_repo, f"issue_{issue_num}")
+        if issue_data is not None or int(issue_num) > MAX_GRAPHQL_INT:
+            results[(target_repo, issue_num)] = issue_data
+        else:
+            by_repo.setdefault(target_repo, []).append(issue_num)
+    if not by_repo:
+        return results
+
+    # Issue numbers may also be PRs, which are closed once merged
+    fields = []
+    for j, (target_repo, numbers) in enumerate(by_repo.items()):
+        owner, name = target_repo.split('/', 1)
+        lookups = " ".join(f"i{k}: issueOrPullRequest(number: {int(n)}) {{ ... on Issue {{ state title }} ... on PullRequest {{ state title }} }}"
+                           for k, n in enumerate(numbers))
+        fields.append(f'r{j}: repository(owner: "{owner}", name: "{name}") {{ {lookups} }}')
+    data = run_gh_graphql(f"{{ {' '.join(fields)} }}") or {}
+
+    for j, (target_repo, numbers) in enumerate(by_repo.items()):
+        repository = data.get(f"r{j}") or {}
+        for k, issue_num in enumerate(numbers):
+            issue = repository.get(f"i{k}")
+            issue_data = None
+            if issue and issue.get('state'):
+                issue_data = {'state': 'open' if issue['state'] == 'OPEN' else 'closed', 'title': issue.get('title', '')}
+                if issue_data['state'] == 'closed':
+                    write_cache(cache_dir, target_repo, f"issue_{issue_num}", issue_data)
+            results[(target_repo, issue_num)] = issue_data
+    return results
+
+def parse_issue_ref(repo, issue_ref):
+    """Parse issue reference into (target_repo, issue_num)."""
+    if '#' in issue_ref and '/' in issue_ref:
+        # Cross-repo: owner/repo#123
+        target_repo, issue_num = issue_ref.rsplit('#', 1)
+    else:
+        # Same-repo: 123
+        target_repo, issue_num = repo, issue_ref
+    return target_repo, issue_num
 
-    commits = []
-    for line in output.split('\n'):
+def get_merge_train_commits(branch="next", since="10 years ago"):
+    """Yield all merge-train commits as (sha, subject), as git log finds them."""
+    # Let git skip merges that don't mention a merge-train; --grep matches the
+    # whole message, so subjects are still checked below
+    cmd = ["git", "log", "--merges", "--grep=merge-train/", f"--since={since}", "--pretty=format:%H|%s", branch]
+
+    for line in stream_command(cmd):
         if not line:
             continue
 
@@ -53,36 +181,25 @@ def get_merge_train_commits(branch="next", since="10 years ago"):
         if 'merge-train/' not in subject or '#' not in subject:
             continue
 
-        commits.append((sha, subject))
-
-    return commits
+        yield sha, subject
 
 def get_train_prs(commit_sha):
     """Get PRs from a merge-train commit by examining the train commits."""
-    # Get first parent
-    first_parent = run_command(["git", "rev-parse", f"{commit_sha}^1"])
-    if not first_parent:
-        return []
-
-    # Get commits in the train
-    train_commits = run_command(["git", "rev-list", "--reverse", f"{first_parent}..{commit_sha}^2"])
-    if not train_commits:
+    # Get the subjects of the commits in the train, oldest first
+    subjects = run_command(["git", "log", "--reverse", "--format=%s", f"{commit_sha}^1..{commit_sha}^2"])
+    if not subjects:
         return []
 
     prs = []
-    for train_commit in train_commits.split('\n'):
-        if not train_commit:
-            continue
-
-        # Get commit message
-        message = run_command(["git", "log", "--format=%s", "-n1", train_commit])
+    for message in subjects.split('\n'):
+        message = message.strip()
 
         # Skip merge commits without PR numbers
         if message.startswith('Merge branch') and '#' not in message:
             continue
 
         # Extract PR number
-        match = re.search(r'#(\d+)', message)
+        match = NUMBER_REF_PATTERN.search(message)
         if match:
             prs.append(int(match.group(1)))
 
@@ -94,27 +211,38 @@ def extract_issue_refs(text):
         return []
 
     issues = []
-    cross_repo_refs = []
+    cross_repo_refs = set()
 
     # First, extract all URL-based references (these work with or without keywords)
-    for owner, repo, num in re.findall(r'https?://github\.com/([a-zA-Z0-9_-]+)/([a-zA-Z0-9_-]+)/issues/(\d+)', text):
-        cross_repo_refs.append(num)
+    for owner, repo, num in ISSUE_URL_PATTERN.findall(text):
+        cross_repo_refs.add(num)
         issues.append(f"{owner}/{repo}#{num}")
 
-    # Then extract keyword-based references
-    for line in text.split('\n'):
-        if re.search(r'\b(close[sd]?|fix(?:e[sd])?|resolve[sd]?)\b', line, re.IGNORECASE):
+    # Then extract keyword-based references. Only lines with a '#' can have
+    # any, so rather than splitting the text into lines, jump from each '#'
+    # to the line around it and on to the next '#' after that line
+    hash_pos = text.find('#')
+    while hash_pos != -1:
+        line_start = text.rfind('\n', 0, hash_pos) + 1
+        line_end = text.find('\n', hash_pos)
+        if line_end == -1:
+            line_end = len(text)
+        line = text[line_start:line_end]
+        hash_pos = text.find('#', line_end)
+
+        if CLOSING_KEYWORD_PATTERN.search(line):
             # Cross-repo: owner/repo#123
-            for owner_repo, num in re.findall(r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+)#(\d+)', line):
-                cross_repo_refs.append(num)
+            for owner_repo, num in CROSS_REPO_REF_PATTERN.findall(line):
+                cross_repo_refs.add(num)
                 issues.append(f"{owner_repo}#{num}")
 
             # Same-repo: #123 (skip if already captured as cross-repo or URL)
-            for num in re.findall(r'#(\d+)', line):
+            for num in NUMBER_REF_PATTERN.findall(line):
                 if num not in cross_repo_refs:
                     issues.append(num)
 
-    return list(set(issues))
+    # Deduplicated, in the order they appear
+    return list(dict.fromkeys(issues))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -130,19 +258,33 @@ def main():
         default='AztecProtocol/aztec-packages',
         help='Repository in format owner/repo (default: AztecProtocol/aztec-packages)'
     )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=8,
+        help='Number of git and GitHub API calls to run at once (default: 8)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Fetch everything again instead of using merged PRs and closed issues saved in {CACHE_DIR}'
+    )
 
     args = parser.parse_args()
+    cache_dir = None if args.no_cache else CACHE_DIR
 
     print(f"Scanning merge-train commits since {args.since}...")
-    commits = get_merge_train_commits(since=args.since)
-    print(f"Found {len(commits)} merge-train commits")
-    print()
-
-    print("Extracting PRs from merge-trains...")
     all_prs = set()
-    for sha, subject in commits:
-        prs = get_train_prs(sha)
-        all_prs.update(prs)
+    # One git log per train, several at a time, each started as soon as the
+    # scan finds its merge
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        train_prs = [executor.submit(get_train_prs, sha) for sha, subject in get_merge_train_commits(since=args.since)]
+        print(f"Found {len(train_prs)} merge-train commits")
+        print()
+
+        print("Extracting PRs from merge-trains...")
+        for prs in train_prs:
+            all_prs.update(prs.result())
 
     print(f"Found {len(all_prs)} unique PRs in merge-trains")
     print()
@@ -150,27 +292,35 @@ def main():
     print(f"Checking PRs for issue references...")
 
     issue_to_prs = defaultdict(list)
+    pr_numbers = sorted(all_prs)
+
+    # Fetch the PRs in batches, one query each, several at a time; results
+    # are handled in order so the PRs stay sorted under each issue
+    batches = [pr_numbers[start:start + PR_BATCH_SIZE] for start in range(0, len(pr_numbers), PR_BATCH_SIZE)]
     checked = 0
 
-    for pr_num in sorted(all_prs):
-        checked += 1
-        if checked % 50 == 0:
-            print(f"  Checked {checked}/{len(all_prs)} PRs...", file=sys.stderr)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        results = executor.map(lambda batch: fetch_pull_requests(args.repo, batch, cache_dir), batches)
+        for batch, pull_requests in zip(batches, results):
+            checked += len(batch)
+            if checked % 50 == 0:
+                print(f"  Checked {checked}/{len(all_prs)} PRs...", file=sys.stderr)
 
-        pr_data = run_gh_api(f"repos/{args.repo}/pulls/{pr_num}")
+            for pr_num in batch:
+                pr_data = pull_requests.get(pr_num)
 
-        if not pr_data:
-            continue
+                if not pr_data:
+                    continue
 
-        title = pr_data.get('title', '')
-        body = pr_data.get('body', '') or ''
+                title = pr_data.get('title', '')
+                body = pr_data.get('body', '') or ''
 
-        combined = f"{title}\n{body}"
-        refs = extract_issue_refs(combined)
+                combined = f"{title}\n{body}"
+                refs = extract_issue_refs(combined)
 
-        if refs:
-            for issue in refs:
-                issue_to_prs[issue].append((pr_num, title))
+                # By (target_repo, issue_num), so a same-repo issue linked by URL isn't counted twice
+                for issue in dict.fromkeys(parse_issue_ref(args.repo, ref) for ref in refs):
+                    issue_to_prs[issue].append((pr_num, title))
 
     if not issue_to_prs:
         print("No issues found!")
@@ -184,9 +334,16 @@ def main():
     closed_issues = []
     not_found = []
 
-    for issue in sorted(issue_to_prs.keys(), key=int):
-        issue_data = run_gh_api(f"repos/{args.repo}/issues/{issue}")
+    # This repo's issues first, then other repos'
+    issues = sorted(issue_to_prs.keys(), key=lambda issue: (issue[0] != args.repo, issue[0], int(issue[1])))
+    issue_data_by_issue = {}
+    batches = [issues[start:start + ISSUE_BATCH_SIZE] for start in range(0, len(issues), ISSUE_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for results in executor.map(lambda batch: fetch_issues(batch, cache_dir), batches):
+            issue_data_by_issue.update(results)
 
+    for issue in issues:
+        issue_data = issue_data_by_issue.get(issue)
         if not issue_data:
             not_found.append(issue)
             continue
@@ -203,8 +360,9 @@ def main():
     print("ORPHANED ISSUES (still open, should have been auto-closed)")
     print("="*70)
     if open_issues:
-        for issue, issue_title, prs in open_issues:
-            print(f"\n#{issue}: {issue_title}")
+        for (target_repo, issue_num), issue_title, prs in open_issues:
+            label = f"#{issue_num}" if target_repo == args.repo else f"{target_repo}#{issue_num}"
+            print(f"\n{label}: {issue_title}")
             for pr_num, pr_title in prs:
                 print(f"  ← PR #{pr_num}: {pr_title}")
     else:
@@ -223,8 +381,9 @@ def main():
     if open_issues:
         print("To close these issues, run:")
         print()
-        for issue, _, _ in open_issues:
-            print(f"  gh issue close {issue} --comment 'Auto-closed from merged PR'")
+        for (target_repo, issue_num), _, _ in open_issues:
+            repo_flag = "" if target_repo == args.repo else f" --repo {target_repo}"
+            print(f"  gh issue close {issue_num}{repo_flag} --comment 'Auto-closed from merged PR'")
         print()
 
 if __name__ == "__main__":
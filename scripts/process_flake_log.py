@@ -6,9 +6,20 @@ import re
 import subprocess
 import sys
 import json
+import tempfile
+from collections import Counter
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+    # The libyaml parser is much faster when PyYAML was built with it
+    YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+except ImportError:
+    YAML_AVAILABLE = False
 
 FLAKE_MARKER = "<!-- CI3_FLAKE_DETECTION_COMMENT -->"
 TEST_PATTERNS_FILE = ".test_patterns.yml"
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
 def run(cmd, input_data=None):
     """Execute command and return (success, stdout, stderr)"""
@@ -32,13 +43,14 @@ def get_pr_number():
     return None
 
 def read_flakes(file_path):
-    """Read flake data from file"""
+    """Yield the non-empty lines of the flakes file, stripped"""
     try:
         with open(file_path, 'r') as f:
-            lines = [line.strip() for line in f if line.strip()]
-            return lines
+            for line in f:
+                if line := line.strip():
+                    yield line
     except FileNotFoundError:
-        return []
+        return
 
 def get_comment_id(pr_number):
     """Find existing flake comment ID on PR"""
@@ -48,53 +60,103 @@ def get_comment_id(pr_number):
     ])
     return out.split("\n")[0] if ok and out else None
 
+def comment_id_file(pr_number):
+    """File remembering the flake comment ID for later runs in the same CI job (and container)"""
+    return os.path.join(tempfile.gettempdir(), f"flake_comment_id_{pr_number}")
+
+def save_comment_id(pr_number, comment_id):
+    """Remember the flake comment ID, if the file can be written"""
+    try:
+        with open(comment_id_file(pr_number), 'w') as f:
+            f.write(comment_id)
+    except OSError:
+        pass
+
 def post_comment(pr_number, body):
-    """Create or update flake comment on PR"""
-    if comment_id := get_comment_id(pr_number):
+    """Create or update flake comment on PR
+
+    The comment ID is remembered in the temp directory, so later runs in the
+    same CI job update the comment directly instead of listing the PR's comments.
+    """
+    id_file = comment_id_file(pr_number)
+    try:
+        with open(id_file) as f:
+            saved_id = f.read().strip()
+    except OSError:
+        saved_id = None
+
+    if comment_id := saved_id or get_comment_id(pr_number):
         print(f"Updating comment {comment_id} on PR #{pr_number}")
         ok, _, err = run(["gh", "api", f"repos/{{owner}}/{{repo}}/issues/comments/{comment_id}", "-X", "PATCH", "-f", f"body={body}"])
-        if not ok:
+        if ok:
+            if not saved_id:
+                save_comment_id(pr_number, comment_id)
+        elif saved_id:
+            # The remembered comment may have been deleted; look for it again
+            try:
+                os.remove(id_file)
+            except OSError:
+                pass
+            return post_comment(pr_number, body)
+        else:
             print(f"Update failed: {err}")
         return ok
     print(f"Creating new comment on PR #{pr_number}")
-    ok, _, err = run(["gh", "pr", "comment", pr_number, "--body", body])
+    ok, out, err = run(["gh", "pr", "comment", pr_number, "--body", body])
     if not ok:
         print(f"Creation failed: {err}")
+    elif match := re.search(r"#issuecomment-(\d+)", out):
+        save_comment_id(pr_number, match.group(1))
     return ok
 
 def load_flake_groups():
-    """Load flake groups configuration from .test_patterns.yml using yq"""
-    try:
+    """Load flake groups configuration from .test_patterns.yml, in process with PyYAML or else using yq"""
+    if YAML_AVAILABLE:
+        try:
+            with open(TEST_PATTERNS_FILE) as f:
+                patterns = yaml.load(f, Loader=YAML_LOADER)
+        except (OSError, yaml.YAMLError):
+            return {}
+        groups = patterns.get('flake_groups') if isinstance(patterns, dict) else None
+    else:
         ok, out, _ = run(["yq", "e", "-o=json", ".flake_groups", TEST_PATTERNS_FILE])
         if not ok or not out:
             return {}
-        groups = json.loads(out)
-        if not groups or groups == "null":
+        try:
+            groups = json.loads(out)
+        except json.JSONDecodeError:
             return {}
+    if not groups or groups == "null":
+        return {}
+    try:
         # Convert to dict keyed by id
         return {g['id']: g for g in groups}
-    except (json.JSONDecodeError, KeyError):
+    except KeyError:
         return {}
 
-def parse_flakes_by_group(flakes):
-    """Parse flake lines and group them by flake_group_id"""
-    group_pattern = re.compile(r'group:(\S+)')
-    groups = {}
-    ungrouped = []
-
-    for flake in flakes:
+def group_id_pattern(group_ids):
+    """Build the regex matching a flake's group, specialized to the known group ids when there are any"""
+    if not group_ids:
+        return re.compile(r'group:(\S+)')
+    # Same whole-id matching as the generic pattern, but lines with no known group fail fast
+    known = '|'.join(re.escape(str(group_id)) for group_id in group_ids)
+    return re.compile(rf'group:({known})(?!\S)')
+
+def parse_flakes(file_path, group_ids=None):
+    """Read the flakes file in one pass, returning all flakes and the number of flakes per flake_group_id"""
+    group_pattern = group_id_pattern(group_ids)
+    flakes = []
+    group_counts = Counter()
+
+    for flake in read_flakes(file_path):
+        flakes.append(flake)
         match = group_pattern.search(flake)
         if match:
-            group_id = match.group(1)
-            if group_id not in groups:
-                groups[group_id] = []
-            groups[group_id].append(flake)
-        else:
-            ungrouped.append(flake)
+            group_counts[match.group(1)] += 1
 
-    return groups, ungrouped
+    return flakes, group_counts
 
-def check_flake_thresholds(flake_groups_config, flakes_by_group):
+def check_flake_thresholds(flake_groups_config, group_counts):
     """
     Check if any flake group exceeds its error threshold.
 
@@ -106,7 +168,7 @@ def check_flake_thresholds(flake_groups_config, flakes_by_group):
     """
     exceeded = []
 
-    for group_id, flakes in flakes_by_group.items():
+    for group_id, flake_count in group_counts.items():
         group_config = flake_groups_config.get(group_id)
         if not group_config:
             continue
@@ -115,7 +177,6 @@ def check_flake_thresholds(flake_groups_config, flakes_by_group):
         if threshold is None:
             continue
 
-        flake_count = len(flakes)
         if flake_count >= threshold:
             group_name = group_config.get('name', group_id)
             exceeded.append(f"Group '{group_name}' ({group_id}): {flake_count} flakes >= threshold of {threshold}")
@@ -124,14 +185,14 @@ def check_flake_thresholds(flake_groups_config, flakes_by_group):
 
 def strip_ansi_colors(text):
     """Strip ANSI color codes from text"""
-    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-    return ansi_escape.sub('', text)
+    return ANSI_ESCAPE_PATTERN.sub('', text)
 
 def build_comment(flakes, threshold_exceeded=None):
     """Build markdown comment body from flake list"""
     count = len(flakes)
-    # Strip color codes from flakes for clean markdown display
-    tests = "\n".join(strip_ansi_colors(flake) for flake in flakes)
+    # Strip color codes from flakes for clean markdown display, all at once
+    # (no escape code contains a newline, so none spans two flakes)
+    tests = strip_ansi_colors("\n".join(flakes))
 
     threshold_warning = ""
     if threshold_exceeded:
@@ -153,20 +214,18 @@ def main():
     parser.add_argument("--post-comment", action="store_true", help="Post PR comment (only use in CI)")
     args = parser.parse_args()
 
-    flakes = read_flakes(args.flakes_file)
+    # Load flake group configuration, so only its groups are looked for
+    flake_groups_config = load_flake_groups()
+
+    # Read and group the flakes together
+    flakes, group_counts = parse_flakes(args.flakes_file, flake_groups_config)
     if not flakes:
         print(f"No flaked tests found in {args.flakes_file}")
         return 0
     print(f"Found {len(flakes)} flaked test(s)")
 
-    # Load flake group configuration
-    flake_groups_config = load_flake_groups()
-
-    # Parse flakes by group
-    flakes_by_group, ungrouped = parse_flakes_by_group(flakes)
-
     # Check thresholds
-    threshold_exceeded = check_flake_thresholds(flake_groups_config, flakes_by_group)
+    threshold_exceeded = check_flake_thresholds(flake_groups_config, group_counts)
 
     # Post comment if requested
     if args.post_comment: